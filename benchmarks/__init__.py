@@ -0,0 +1,46 @@
+"""
+Performance benchmarks. Run each module with ``python -m benchmarks.<name>``
+from the repository root; they use the same settings and DATABASE_URL as
+``manage.py``. Pages link fingerprinted static files, so run
+``manage.py collectstatic`` first.
+"""
+import os
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "know_how.settings")
+    import django
+    django.setup()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an unsorted list of numbers."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def make_client(**defaults):
+    """A test client whose Host passes ALLOWED_HOSTS outside the test runner."""
+    from django.test import Client
+    return Client(SERVER_NAME="127.0.0.1", **defaults)
+
+
+def make_async_client(**defaults):
+    """Async counterpart of ``make_client``."""
+    from django.test import AsyncClient
+    return AsyncClient(headers={"host": "127.0.0.1"}, **defaults)
+
+
+def add_db_latency(milliseconds):
+    """Sleep before every query to stand in for a remote database."""
+    import time
+    from django.db.backends.utils import CursorWrapper
+
+    execute = CursorWrapper._execute
+
+    def _execute(self, *args, **kwargs):
+        time.sleep(milliseconds / 1000)
+        return execute(self, *args, **kwargs)
+
+    CursorWrapper._execute = _execute
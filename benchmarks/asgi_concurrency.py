@@ -0,0 +1,108 @@
+"""
+Throughput of a single worker against a slow database: the WSGI path
+(gthread, GUNICORN_THREADS threads) versus ASGI with the async views.
+
+    python -m benchmarks.asgi_concurrency --concurrency 20 --db-latency 20
+
+Both run in-process. The WSGI worker is modelled as a pool of gunicorn's
+thread count; the ASGI worker is one event loop. --db-latency adds a
+sleep to every query as a stand-in for the network round trip to the
+hosted database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks import (
+    add_db_latency, make_async_client, make_client, percentile, setup_django,
+)
+
+
+def run_wsgi(paths, concurrency, requests, threads):
+    client_slots = threading.Semaphore(threads)
+    timings = []
+    lock = threading.Lock()
+
+    def client_loop():
+        client = make_client()
+        for index in range(requests):
+            started = time.perf_counter()
+            with client_slots:
+                client.get(paths[index % len(paths)])
+            with lock:
+                timings.append((time.perf_counter() - started) * 1000)
+
+    workers = [threading.Thread(target=client_loop) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return timings, time.perf_counter() - started
+
+
+def run_asgi(paths, concurrency, requests):
+    timings = []
+
+    async def client_loop():
+        client = make_async_client()
+        for index in range(requests):
+            started = time.perf_counter()
+            await client.get(paths[index % len(paths)])
+            timings.append((time.perf_counter() - started) * 1000)
+
+    async def main():
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return timings, time.perf_counter() - started
+
+
+def child(args):
+    setup_django()
+    add_db_latency(args.db_latency)
+    if args.child == "asgi":
+        timings, elapsed = run_asgi(args.path, args.concurrency, args.requests)
+    else:
+        timings, elapsed = run_wsgi(args.path, args.concurrency, args.requests, args.threads)
+    print(json.dumps({
+        "rps": len(timings) / elapsed,
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=10, help="per client")
+    parser.add_argument("--db-latency", type=float, default=20, help="ms per query")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("GUNICORN_THREADS", "2")))
+    parser.add_argument("--path", action="append", help="URL path (repeatable)")
+    parser.add_argument("--child", choices=["wsgi", "asgi"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.path = args.path or ["/"]
+    if args.child:
+        child(args)
+        return
+
+    print(f"{'mode':<6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for mode in ("wsgi", "asgi"):
+        env = dict(os.environ, ASYNC_VIEWS="True" if mode == "asgi" else "False")
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.asgi_concurrency", "--child", mode]
+            + sys.argv[1:],
+            check=True, capture_output=True, text=True, env=env,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<6} {result['rps']:>8.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
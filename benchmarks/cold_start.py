@@ -0,0 +1,86 @@
+"""
+Cold-start time of a fresh interpreter, checked against a committed baseline.
+
+    python -m benchmarks.cold_start            # compare with the baseline
+    python -m benchmarks.cold_start --save     # record a new baseline
+
+Two start-ups are measured: ``setup`` (``django.setup()`` only, what every
+management command pays) and ``urls`` (also importing the URLconf, what a
+worker loads before serving). Wall time is noisy across machines, so the
+check fails on a wall-time regression beyond ``--tolerance`` or on any
+growth in the number of modules imported, which is deterministic.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks import setup_django
+
+BASELINE = Path(__file__).parent / "baselines" / "cold_start.json"
+TARGETS = {"setup": [], "urls": ["know_how.urls"]}
+
+
+def measure(modules, runs):
+    from know_how.management.commands.importtime import (
+        by_package, profile_startup, startup_command,
+    )
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(startup_command(modules), check=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    _, rows = profile_startup(modules)
+    return {
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "imports": len(rows),
+        "top_packages_ms": {
+            package: round(self_us / 1000, 1)
+            for package, self_us in by_package(rows).most_common(8)
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed wall-time regression as a fraction (default 0.25).")
+    parser.add_argument("--save", action="store_true", help="Write a new baseline.")
+    args = parser.parse_args()
+    setup_django()
+
+    results = {target: measure(modules, args.runs) for target, modules in TARGETS.items()}
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+
+    print(f"{'start-up':<8} {'median ms':>10} {'min ms':>8} {'imports':>8} {'baseline ms':>12} {'imports':>8}")
+    failures = []
+    for target, result in results.items():
+        base = baseline.get(target, {})
+        print(
+            f"{target:<8} {result['median_ms']:>10.1f} {result['min_ms']:>8.1f} "
+            f"{result['imports']:>8} {base.get('median_ms', '-'):>12} {base.get('imports', '-'):>8}"
+        )
+        if not base or args.save:
+            continue
+        if result["median_ms"] > base["median_ms"] * (1 + args.tolerance):
+            failures.append(f"{target}: {result['median_ms']} ms vs {base['median_ms']} ms")
+        if result["imports"] > base["imports"]:
+            failures.append(f"{target}: {result['imports']} imports vs {base['imports']}")
+
+    if args.save:
+        BASELINE.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved {os.path.relpath(BASELINE)}")
+    elif failures:
+        print("Cold start regressed:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
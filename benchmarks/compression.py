@@ -0,0 +1,73 @@
+"""
+Bytes on the wire for real pages with and without response compression.
+
+    python -m benchmarks.compression
+
+Each page is fetched in-process with ``Accept-Encoding`` set to identity,
+gzip and br, using the same fixtures as ``benchmarks.http_load``. The
+table shows the transferred size of each and the median time
+``CompressionMiddleware`` spends compressing that page.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import make_client, setup_django
+
+ENCODINGS = ("identity", "gzip", "br")
+
+
+def compress_ms(coding, body, runs):
+    from know_how.compression import compress_body
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        compress_body(coding, body)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=50, help="compressions timed per page")
+    args = parser.parse_args()
+    setup_django()
+    from django.urls import reverse
+    from benchmarks.http_load import Fixtures
+
+    fixtures = Fixtures(0)
+    try:
+        pages = {
+            "home": reverse("home"),
+            "listing_detail": reverse("listing_detail", args=[fixtures.listing.slug]),
+            "profile": reverse("profiles:profile", args=[fixtures.tutor.username]),
+            "page_content": reverse("page_content", args=[fixtures.page.slug]),
+        }
+        client = make_client()
+        print(
+            f"{'page':<16} {'identity B':>11} {'gzip B':>8} {'saved':>6} "
+            f"{'br B':>8} {'saved':>6} {'gzip ms':>8} {'br ms':>6}"
+        )
+        for name, path in pages.items():
+            sizes = {}
+            for coding in ENCODINGS:
+                response = client.get(path, HTTP_ACCEPT_ENCODING=coding)
+                sizes[coding] = len(response.content)
+                if coding != "identity":
+                    assert response["Content-Encoding"] == coding, (name, coding)
+                else:
+                    body = response.content
+            print(
+                f"{name:<16} {sizes['identity']:>11} {sizes['gzip']:>8} "
+                f"{1 - sizes['gzip'] / sizes['identity']:>6.0%} {sizes['br']:>8} "
+                f"{1 - sizes['br'] / sizes['identity']:>6.0%} "
+                f"{compress_ms('gzip', body, args.runs):>8.2f} "
+                f"{compress_ms('br', body, args.runs):>6.2f}"
+            )
+    finally:
+        fixtures.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Per-request database connection overhead: a fresh connection per request
+(the old behaviour) versus persistent connections versus the in-process
+pool.
+
+    python -m benchmarks.db_connections --requests 200
+
+Point DATABASE_URL at the real, remote database: the difference is mostly
+the TCP and TLS handshake, so a local SQLite file shows very little. The
+pooled mode only applies to PostgreSQL.
+"""
+import argparse
+import time
+
+from benchmarks import percentile, setup_django
+
+
+def run(mode, requests, pool_size):
+    from django.core import signals
+    from django.db import connections
+    from know_how.db.pool import connection_stats
+
+    connection = connections["default"]
+    connection.close()
+    connection.settings_dict["CONN_MAX_AGE"] = 600 if mode == "persistent" else 0
+    connection.settings_dict["POOL_SIZE"] = pool_size if mode == "pooled" else 0
+    connects_before = connection_stats["connects"]
+    setup_before = connection_stats["connect_seconds"]
+
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        signals.request_started.send(sender=__name__)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        signals.request_finished.send(sender=__name__)
+        timings.append((time.perf_counter() - started) * 1000)
+    connection.close()
+
+    connects = connection_stats["connects"] - connects_before
+    setup = connection_stats["connect_seconds"] - setup_before
+    return {
+        "mode": mode,
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "connects": connects,
+        "setup_ms": setup * 1000 / connects if connects else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+    setup_django()
+
+    from django.db import connections
+
+    modes = ["per-request", "persistent"]
+    if connections["default"].vendor == "postgresql":
+        modes.append("pooled")
+    print(f"{'mode':<12} {'p50 ms':>8} {'p95 ms':>8} {'connects':>9} {'setup ms':>9}")
+    for mode in modes:
+        result = run(mode, args.requests, args.pool_size)
+        print(
+            f"{result['mode']:<12} {result['p50_ms']:>8.3f} {result['p95_ms']:>8.3f} "
+            f"{result['connects']:>9} {result['setup_ms']:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+First-request latency and per-worker private memory, with and without the
+pre-fork warm-up that gunicorn.conf.py runs.
+
+    python -m benchmarks.first_request
+
+Each mode starts a fresh interpreter that loads the app the way the
+gunicorn master does, forks a "worker" and has it serve each page once.
+Private memory comes from /proc, so this needs Linux.
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import make_client, setup_django
+
+PATHS = ["/", "/accounts/login/", "/accounts/signup/"]
+
+
+def private_kb():
+    with open("/proc/self/smaps_rollup") as smaps:
+        fields = dict(line.split(":", 1) for line in smaps if ":" in line)
+    return sum(int(fields[name].split()[0]) for name in ("Private_Clean", "Private_Dirty"))
+
+
+def child(warm):
+    setup_django()
+    import know_how.wsgi  # noqa: F401 - what preload_app imports
+    if warm:
+        from know_how.warmup import warm_up
+        warm_up()
+        gc.collect()
+        gc.freeze()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        client = make_client()
+        timings = {}
+        for path in PATHS:
+            started = time.perf_counter()
+            client.get(path)
+            timings[path] = (time.perf_counter() - started) * 1000
+        result = {"first_request_ms": timings, "worker_private_kb": private_kb()}
+        os.write(write_fd, json.dumps(result).encode())
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        print(pipe.read())
+    os.waitpid(pid, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--child", choices=["warm", "cold"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child == "warm")
+        return
+
+    results = {}
+    for mode in ("cold", "warm"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.first_request", "--child", mode],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'path':<20} {'cold ms':>9} {'warm ms':>9}")
+    for path in PATHS:
+        print(
+            f"{path:<20} {results['cold']['first_request_ms'][path]:>9.1f} "
+            f"{results['warm']['first_request_ms'][path]:>9.1f}"
+        )
+    print(
+        f"{'worker private KiB':<20} {results['cold']['worker_private_kb']:>9} "
+        f"{results['warm']['worker_private_kb']:>9}"
+    )
+
+
+if __name__ == "__main__":
+    main()
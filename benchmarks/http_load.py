@@ -0,0 +1,341 @@
+"""
+Latency, throughput and queries per request for the main pages and forms,
+checked against a committed baseline.
+
+    python -m benchmarks.http_load                  # in-process, compare with the baseline
+    python -m benchmarks.http_load --server         # start gunicorn locally and load it
+    python -m benchmarks.http_load --server http://127.0.0.1:8000
+    python -m benchmarks.http_load --save           # record a new baseline
+
+Each scenario drives a real URL pattern: the home page, a listing, a
+profile, a content page, posting a review and creating a listing. The
+fixture users and rows they need are created up front and removed
+afterwards. In-process runs go through the Django test client one request
+at a time, so they measure the application alone; server runs use
+``--concurrency`` keep-alive connections.
+
+Queries per request come from ``QueryInspectorMiddleware`` in-process and
+from the ``Server-Timing`` header against a server (when it is sampled; a
+server started by ``--server`` samples every request).
+Tail latencies are noisy, so the check fails when the median regresses
+beyond ``--tolerance`` or when any scenario runs more queries than its
+baseline; p95 and p99 are reported alongside.
+"""
+import argparse
+import http.client
+import json
+import os
+import re
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks import make_client, percentile, setup_django
+
+BASELINE = Path(__file__).parent / "baselines" / "http_load.json"
+FIXTURE_PREFIX = "bench"
+SERVER_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class Fixtures:
+    """The rows the scenarios read and the users they act as."""
+
+    def __init__(self, requests):
+        from django.contrib.auth.models import User
+        from django.utils import timezone
+        from listings.models import Listing, TimeSlot
+        from site_content.models import Page
+
+        self.run = secrets.token_hex(3)
+        self.sessions = []
+        self.tutor = User.objects.create_user(f"{FIXTURE_PREFIX}_tutor_{self.run}")
+        self.listing = Listing.objects.create(
+            title="Benchmark listing", slug=f"{FIXTURE_PREFIX}-listing-{self.run}",
+            tutor=self.tutor, content="<p>Benchmark</p>", status=1,
+        )
+        now = timezone.now()
+        TimeSlot.objects.bulk_create(
+            TimeSlot(
+                listing=self.listing, start_time=now + timezone.timedelta(days=day),
+                end_time=now + timezone.timedelta(days=day, hours=1), status=1,
+            )
+            for day in range(1, 4)
+        )
+        self.page = Page.objects.create(
+            title="Benchmark page", slug=f"{FIXTURE_PREFIX}-page-{self.run}",
+            content="<p>Benchmark</p>", status=1,
+        )
+        # Each review needs an author who hasn't reviewed the tutor yet
+        self.reviewers = [
+            User.objects.create_user(f"{FIXTURE_PREFIX}_reviewer_{self.run}_{index}")
+            for index in range(requests)
+        ]
+
+    def login(self, client, user):
+        """Log ``client`` in as ``user``; return the session cookie."""
+        from django.conf import settings
+
+        client.force_login(user)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.sessions.append(session)
+        return session
+
+    def remove(self):
+        from importlib import import_module
+
+        from django.conf import settings
+        from django.contrib.auth.models import User
+        from site_content.models import Page
+
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        for session in self.sessions:
+            SessionStore(session_key=session).delete()
+        User.objects.filter(username__startswith=f"{FIXTURE_PREFIX}_").filter(
+            username__contains=self.run
+        ).delete()
+        Page.objects.filter(pk=self.page.pk).delete()
+
+
+def scenarios(fixtures):
+    """``(name, method, path, data, user_for_request)`` for each scenario."""
+    from django.urls import reverse
+
+    reviewers = iter(fixtures.reviewers)
+    profile = reverse("profiles:profile", args=[fixtures.tutor.username])
+    listing_number = iter(range(10 ** 6))
+    return [
+        ("home", "GET", reverse("home"), None, None),
+        ("listing_detail", "GET",
+         reverse("listing_detail", args=[fixtures.listing.slug]), None, None),
+        ("profile", "GET", profile, None, None),
+        ("page_content", "GET",
+         reverse("page_content", args=[fixtures.page.slug]), None, None),
+        ("review_post", "POST", profile,
+         lambda: {"rating": 8, "title": "Great", "body": "Clear and patient."},
+         lambda: next(reviewers)),
+        ("listing_create", "POST", reverse("listing_create"),
+         lambda: {
+             "title": f"Benchmark listing {fixtures.run} {next(listing_number)}",
+             "short_description": "Benchmark", "content": "<p>Benchmark</p>",
+             "location": "Online", "session_time": "1 hour", "status": 0,
+         },
+         lambda: fixtures.tutor),
+    ]
+
+
+def summarise(timings, elapsed, queries):
+    return {
+        "requests": len(timings),
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "rps": round(len(timings) / elapsed, 1),
+        "queries": max(queries) if queries else None,
+    }
+
+
+def run_in_process(fixtures, scenario, requests, warmup):
+    name, method, path, data, user_for = scenario
+    # Log each request's user in up front, outside the timed section
+    clients = []
+    for _ in range(warmup + requests):
+        client = make_client()
+        if user_for:
+            fixtures.login(client, user_for())
+        clients.append(client)
+
+    def send(client):
+        if method == "GET":
+            response = client.get(path)
+        else:
+            response = client.post(path, data())
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name}: {method} {path} returned {response.status_code}")
+        return response
+
+    for client in clients[:warmup]:
+        send(client)
+    timings, queries = [], []
+    started = time.perf_counter()
+    for client in clients[warmup:]:
+        request_started = time.perf_counter()
+        response = send(client)
+        timings.append((time.perf_counter() - request_started) * 1000)
+        query_count = getattr(response.wsgi_request, "query_count", None)
+        if query_count is not None:
+            queries.append(query_count)
+    return summarise(timings, time.perf_counter() - started, queries)
+
+
+def run_against_server(fixtures, base_url, scenario, requests, warmup, concurrency):
+    from django.conf import settings
+
+    name, method, path, data, user_for = scenario
+    url = urlsplit(base_url)
+    csrf = secrets.token_hex(16)
+    # Log each request's user in up front, outside the timed section
+    requests_to_send = []
+    for _ in range(warmup + requests):
+        cookies = f"{settings.CSRF_COOKIE_NAME}={csrf}"
+        if user_for:
+            session = fixtures.login(make_client(), user_for())
+            cookies += f"; {settings.SESSION_COOKIE_NAME}={session}"
+        headers = {"Cookie": cookies, "X-CSRFToken": csrf}
+        body = None
+        if data:
+            body = urlencode(data())
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        requests_to_send.append((body, headers))
+    timings, queries = [], []
+    lock = threading.Lock()
+
+    def client_loop(pending, record):
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80)
+        while True:
+            with lock:
+                body, headers = next(pending, (None, None))
+            if headers is None:
+                break
+            request_started = time.perf_counter()
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            duration = (time.perf_counter() - request_started) * 1000
+            if response.status >= 400:
+                raise RuntimeError(f"{name}: {method} {path} returned {response.status}")
+            if not record:
+                continue
+            match = SERVER_QUERIES.search(response.getheader("Server-Timing", ""))
+            with lock:
+                timings.append(duration)
+                if match:
+                    queries.append(int(match.group(1)))
+        connection.close()
+
+    client_loop(iter(requests_to_send[:warmup]), record=False)
+    pending = iter(requests_to_send[warmup:])
+    threads = [
+        threading.Thread(target=client_loop, args=(pending, True)) for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarise(timings, time.perf_counter() - started, queries)
+
+
+def start_server():
+    """Start gunicorn on a free local port; return the process and its URL."""
+    from django.db import connection
+
+    database = connection.settings_dict
+    print(
+        f"Warning: the server uses the database DATABASE_URL points to "
+        f"({connection.vendor} {database['NAME']}"
+        f"{' on ' + database['HOST'] if database['HOST'] else ''}); "
+        f"the benchmark writes its fixtures there.",
+        file=sys.stderr,
+    )
+    log = tempfile.NamedTemporaryFile(prefix="http_load-gunicorn-", suffix=".log", delete=False)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "know_how.wsgi", "-c", "gunicorn.conf.py",
+         "--bind", f"127.0.0.1:{port}"],
+        # Every response carries Server-Timing, so every request's queries are counted
+        env=dict(os.environ, WEB_CONCURRENCY=os.environ.get("WEB_CONCURRENCY", "2"),
+                 SERVER_TIMING_SAMPLE_RATE="1"),
+        stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn did not start listening within 30s; see {log.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200, help="per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests per scenario")
+    parser.add_argument("--server", nargs="?", const="start", metavar="URL",
+                        help="Load a server at URL, or start gunicorn locally if no URL is given.")
+    parser.add_argument("--concurrency", type=int, default=4, help="connections (server only)")
+    parser.add_argument("--scenario", action="append", help="Only run these (repeatable).")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed median regression as a fraction (default 0.25).")
+    parser.add_argument("--output", type=Path, help="Also write the results as JSON here.")
+    parser.add_argument("--save", action="store_true", help="Write a new baseline.")
+    args = parser.parse_args()
+    setup_django()
+
+    mode = "server" if args.server else "in_process"
+    server = None
+    if args.server == "start":
+        server, args.server = start_server()
+    fixtures = Fixtures(args.warmup + args.requests)
+    try:
+        results = {}
+        for scenario in scenarios(fixtures):
+            if args.scenario and scenario[0] not in args.scenario:
+                continue
+            if args.server:
+                results[scenario[0]] = run_against_server(
+                    fixtures, args.server, scenario, args.requests, args.warmup, args.concurrency
+                )
+            else:
+                results[scenario[0]] = run_in_process(
+                    fixtures, scenario, args.requests, args.warmup
+                )
+    finally:
+        fixtures.remove()
+        if server:
+            server.terminate()
+            server.wait()
+
+    baselines = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    baseline = baselines.get(mode, {})
+    print(
+        f"{'scenario':<16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} "
+        f"{'queries':>8} {'base p50':>9} {'queries':>8}"
+    )
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        print(
+            f"{name:<16} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{result['p99_ms']:>8.1f} {result['rps']:>8.1f} {result['queries'] or '-':>8} "
+            f"{base.get('p50_ms', '-'):>9} {base.get('queries') or '-':>8}"
+        )
+        if not base or args.save:
+            continue
+        if result["p50_ms"] > base["p50_ms"] * (1 + args.tolerance):
+            failures.append(f"{name}: p50 {result['p50_ms']} ms vs {base['p50_ms']} ms")
+        if None not in (result["queries"], base.get("queries")) and result["queries"] > base["queries"]:
+            failures.append(f"{name}: {result['queries']} queries vs {base['queries']}")
+
+    if args.output:
+        args.output.write_text(json.dumps({mode: results}, indent=2) + "\n")
+    if args.save:
+        baselines[mode] = {**baseline, **results}
+        BASELINE.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"Saved {os.path.relpath(BASELINE)} ({mode})")
+    elif failures:
+        print("HTTP load regressed:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
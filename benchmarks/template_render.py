@@ -0,0 +1,104 @@
+"""
+Render time of the listing grid and profile page with the Django and the
+Jinja2 templates.
+
+    python -m benchmarks.template_render --cards 9 --reviews 50
+
+Both engines render the same in-memory objects, so the numbers are
+template time only: no queries, no middleware. Raise ``--cards`` and
+``--reviews`` to see how each engine scales with the size of the loops.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import setup_django
+
+ENGINES = ("django", "jinja2")
+
+
+def render_ms(engine, template_name, context, request, runs):
+    from django.template.loader import get_template
+
+    template = get_template(template_name, using=engine)
+    template.render(context, request)
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        template.render(context, request)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def pages(cards, reviews):
+    from django.contrib.auth.models import User
+    from django.core.paginator import Paginator
+    from django.utils import timezone
+    from listings.models import Listing
+    from profiles.forms import ReviewForm
+    from profiles.models import UserProfile
+    from reviews.models import Review
+
+    tutor = User(id=1, username="tutor", first_name="Ada", last_name="Lovelace")
+    tutor.profile = UserProfile(user=tutor, bio="Teaches guitar", location="Leeds", years_experience=8)
+    listings = [
+        Listing(
+            id=index, tutor=tutor, title=f"Guitar lesson {index}", slug=f"guitar-{index}",
+            short_description="Chords, scales and strumming patterns for beginners " * 3,
+            location="Leeds", session_time="1 hour", created_on=timezone.now(), status=1,
+        )
+        for index in range(1, cards + 1)
+    ]
+    page_obj = Paginator(listings, len(listings) or 1).page(1)
+    review_list = [
+        Review(
+            id=index, target_user=tutor, rating=index % 10 + 1, title=f"Review {index}",
+            body="Clear explanations and plenty of practice.",
+            author=User(id=index + 1, username=f"student{index}"),
+            created_on=timezone.now(), updated_on=timezone.now(),
+        )
+        for index in range(1, reviews + 1)
+    ]
+    return {
+        "listings/index.html": {
+            "listing_list": listings, "object_list": listings, "page_obj": page_obj,
+            "paginator": page_obj.paginator, "is_paginated": False,
+        },
+        "profile.html": {
+            "object": tutor, "profile_user": tutor, "reviews": review_list,
+            "total_reviews": len(review_list), "average_rating": 6.5,
+            "listings": listings[:5], "draft_listings": [],
+            "can_review": True, "review_form": ReviewForm(),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cards", type=int, default=9, help="listing cards on the grid")
+    parser.add_argument("--reviews", type=int, default=50, help="reviews on the profile page")
+    parser.add_argument("--runs", type=int, default=200, help="renders timed per template")
+    args = parser.parse_args()
+    setup_django()
+    from django.contrib.auth.models import AnonymousUser
+    from django.contrib.sessions.backends.signed_cookies import SessionStore
+    from django.test import RequestFactory
+
+    request = RequestFactory().get("/", SERVER_NAME="127.0.0.1")
+    request.user = AnonymousUser()
+    request.session = SessionStore()
+
+    print(f"{'template':<22} {'django ms':>10} {'jinja2 ms':>10} {'speedup':>8}")
+    for template_name, context in pages(args.cards, args.reviews).items():
+        timings = {
+            engine: render_ms(engine, template_name, context, request, args.runs)
+            for engine in ENGINES
+        }
+        print(
+            f"{template_name:<22} {timings['django']:>10.2f} {timings['jinja2']:>10.2f} "
+            f"{timings['django'] / timings['jinja2']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
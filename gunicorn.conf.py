@@ -0,0 +1,78 @@
+"""
+Gunicorn settings, loaded from the working directory by default.
+
+https://docs.gunicorn.org/en/stable/settings.html
+"""
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Heroku sets WEB_CONCURRENCY from the dyno's memory
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+if os.environ.get("ASYNC_VIEWS") == "True":
+    # ASGI: one event loop per worker serves the async views concurrently
+    wsgi_app = "know_how.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "know_how.wsgi:application"
+    threads = int(os.environ.get("GUNICORN_THREADS", "2"))
+    worker_class = "gthread" if threads > 1 else "sync"
+
+# Import the app once in the master and share it with workers copy-on-write
+preload_app = True
+
+# Recycle workers now and then so slow leaks can't grow forever
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+accesslog = "-"
+
+# Workers write their Prometheus samples here so /metrics can merge them.
+# This runs before the preloaded app imports prometheus_client, and runs
+# again on every reload (HUP), so it only makes sure the directory exists.
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "know_how_metrics")
+)
+os.makedirs(metrics_dir, exist_ok=True)
+
+
+def on_starting(server):
+    """Runs once in the master when it starts, but not on a reload."""
+    # Files left from an earlier run belong to dead processes; after a HUP
+    # the directory stays, as the workers are still writing to it
+    for name in os.listdir(metrics_dir):
+        path = os.path.join(metrics_dir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before workers fork."""
+    from know_how.warmup import warm_up
+
+    warm_up()
+    # Park everything loaded so far where the GC never writes to it, so the
+    # collector doesn't dirty (and un-share) those pages in each worker
+    gc.collect()
+    gc.freeze()
+    server.log.info("Warm-up complete")
+
+
+def post_worker_init(worker):
+    """Let `kill -USR2 <worker pid>` log that worker's memory report."""
+    from know_how.memory import install_signal_handler
+
+    install_signal_handler()
+
+
+def child_exit(server, worker):
+    """Drop the exited worker's live gauges (e.g. in-flight requests)."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import Job, OutboundEmail
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'max_attempts', 'run_at', 'created_on')
+    list_filter = ('status', 'task')
+    readonly_fields = ('last_error',)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'status', 'attempts', 'max_attempts', 'run_at', 'created_on')
+    list_filter = ('status',)
+    exclude = ('message',)
+    readonly_fields = ('last_error',)
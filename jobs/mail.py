@@ -0,0 +1,102 @@
+"""
+Outbound email spooled to the database and sent in batches.
+
+``SpoolEmailBackend`` (the ``EMAIL_BACKEND``) stores each message, already
+rendered to MIME, as an ``OutboundEmail`` row and returns, so a signup or
+password reset does not wait on the SMTP server. ``manage.py send_spooled_mail``
+claims due rows like the job worker does (``jobs.queue.claim``) and sends
+them with ``Sender``: one SMTP connection reused across messages and
+batches, paced to ``EMAIL_SPOOL_RATE`` messages a second. A temporary
+failure (4xx reply, dropped connection) is retried with backoff; a
+permanent one (5xx) is kept as failed without retrying.
+"""
+import logging
+import smtplib
+import time
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
+from django.core.mail.message import sanitize_address
+from django.db import DatabaseError
+
+from .models import OutboundEmail
+from .queue import finish, release
+
+logger = logging.getLogger(__name__)
+
+
+class SpoolEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        emails = []
+        for message in email_messages:
+            recipients = message.recipients()
+            if not recipients:
+                continue
+            encoding = message.encoding or settings.DEFAULT_CHARSET
+            emails.append(OutboundEmail(
+                from_email=sanitize_address(message.from_email, encoding),
+                recipients=[sanitize_address(address, encoding) for address in recipients],
+                message=message.message().as_bytes(linesep="\r\n"),
+                max_attempts=settings.EMAIL_SPOOL_MAX_ATTEMPTS,
+            ))
+        try:
+            OutboundEmail.objects.bulk_create(emails)
+        except DatabaseError:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(emails)
+
+
+def is_permanent(exc):
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+class Sender:
+    """Sends claimed ``OutboundEmail`` rows over one SMTP connection."""
+
+    def __init__(self, rate=None):
+        rate = settings.EMAIL_SPOOL_RATE if rate is None else rate
+        self.interval = 1 / rate if rate else 0
+        self.next_send = 0
+        self.smtp = SMTPBackend()
+
+    def pace(self):
+        delay = self.next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_send = max(self.next_send, time.monotonic()) + self.interval
+
+    def send(self, email):
+        """Send one claimed email; return whether it went."""
+        self.pace()
+        try:
+            # Opens a connection if there is none. A dropped one isn't noticed
+            # until sendmail fails; that costs the message an attempt and a
+            # backoff, and close() below makes the next send reconnect
+            self.smtp.open()
+            refused = self.smtp.connection.sendmail(
+                email.from_email, email.recipients, bytes(email.message)
+            )
+        except (smtplib.SMTPException, OSError) as exc:
+            logger.warning("Sending %s failed (attempt %s of %s): %r",
+                           email, email.attempts, email.max_attempts, exc)
+            if not isinstance(exc, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                # The connection is in an unknown state; start afresh
+                self.close()
+            release(email, repr(exc), retry=not is_permanent(exc))
+            return False
+        if refused:
+            logger.warning("%s: some recipients refused: %r", email, refused)
+        finish(email)
+        return True
+
+    def close(self):
+        try:
+            self.smtp.close()
+        except (smtplib.SMTPException, OSError):
+            # The server has gone already; close() has dropped the connection
+            pass
@@ -0,0 +1,82 @@
+"""
+Work the background job queue.
+
+    python manage.py run_jobs
+    python manage.py run_jobs --workers 8 --pool process
+    python manage.py run_jobs --once
+
+Polls for due jobs every ``--poll`` seconds and runs them on a pool of
+``--workers`` threads (the default, for I/O-bound tasks) or processes (for
+CPU-bound ones), claiming only as many as there are idle workers. SIGTERM
+or Ctrl-C stops claiming new jobs and waits for the running ones, which
+fits Heroku's shutdown grace period for short tasks. ``--once`` runs until
+the queue has nothing due, then exits.
+"""
+import signal
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.JOBS_WORKERS)
+        parser.add_argument("--pool", choices=["thread", "process"], default="thread")
+        parser.add_argument("--poll", type=float, default=settings.JOBS_POLL_INTERVAL,
+                            help="Seconds to wait when no job is due.")
+        parser.add_argument("--once", action="store_true",
+                            help="Exit once no job is due instead of polling.")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        if options["pool"] == "process":
+            # Fresh interpreters rather than forks, which would share this
+            # process's database connections
+            pool = ProcessPoolExecutor(workers, mp_context=get_context("spawn"), initializer=django.setup)
+        else:
+            pool = ThreadPoolExecutor(workers, thread_name_prefix="job")
+
+        stopping = threading.Event()
+        if not options["once"]:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *_: stopping.set())
+
+        ran = failed = 0
+        running = set()
+
+        def count(done):
+            nonlocal ran, failed
+            ran += len(done)
+            failed += sum(future.exception() is not None or not future.result() for future in done)
+
+        try:
+            while not stopping.is_set():
+                done = {future for future in running if future.done()}
+                running -= done
+                count(done)
+                idle = workers - len(running)
+                jobs = claim_jobs(idle) if idle else []
+                running.update(pool.submit(run_job, job) for job in jobs)
+                if jobs:
+                    continue
+                if running:
+                    # Wait for a worker to free up, or for the next poll
+                    wait(running, timeout=options["poll"], return_when=FIRST_COMPLETED)
+                elif options["once"]:
+                    break
+                else:
+                    stopping.wait(options["poll"])
+        finally:
+            count(wait(running).done)
+            pool.shutdown()
+            connections.close_all()
+        self.stdout.write(f"Ran {ran} jobs, {failed} failed.")
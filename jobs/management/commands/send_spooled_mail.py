@@ -0,0 +1,69 @@
+"""
+Send the outbound email spool.
+
+    python manage.py send_spooled_mail
+    python manage.py send_spooled_mail --batch-size 100 --rate 5
+    python manage.py send_spooled_mail --once
+
+Claims up to ``--batch-size`` due messages at a time and sends them over
+one SMTP connection, kept open while there is more to send and closed when
+the spool is empty, at no more than ``--rate`` messages a second. Polls
+every ``--poll`` seconds when idle. SIGTERM or Ctrl-C stops after the
+message being sent and puts the rest of the batch back in the spool, as
+if never claimed. ``--once`` exits when nothing is due.
+"""
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from jobs.mail import Sender
+from jobs.models import OutboundEmail
+from jobs.queue import claim, unclaim
+
+
+class Command(BaseCommand):
+    help = "Send spooled outbound email."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.EMAIL_SPOOL_BATCH_SIZE)
+        parser.add_argument("--rate", type=float, default=settings.EMAIL_SPOOL_RATE,
+                            help="Most messages to send a second; 0 for no limit.")
+        parser.add_argument("--poll", type=float, default=settings.JOBS_POLL_INTERVAL,
+                            help="Seconds to wait when nothing is due.")
+        parser.add_argument("--once", action="store_true",
+                            help="Exit once nothing is due instead of polling.")
+
+    def handle(self, *args, **options):
+        stopping = threading.Event()
+        if not options["once"]:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *_: stopping.set())
+
+        sender = Sender(options["rate"])
+        sent = failed = 0
+        try:
+            while not stopping.is_set():
+                close_old_connections()
+                emails = claim(OutboundEmail, options["batch_size"])
+                for index, email in enumerate(emails):
+                    if stopping.is_set():
+                        unclaim(emails[index:])
+                        break
+                    if sender.send(email):
+                        sent += 1
+                    else:
+                        failed += 1
+                if emails:
+                    continue
+                # Idle servers drop connections anyway; don't hold one open
+                sender.close()
+                if options["once"]:
+                    break
+                stopping.wait(options["poll"])
+        finally:
+            sender.close()
+            connections.close_all()
+        self.stdout.write(f"Sent {sent} emails, {failed} failed.")
@@ -0,0 +1,46 @@
+from django.db import models
+from django.db.models.manager import Manager
+from django.utils import timezone
+
+QUEUED, RUNNING, FAILED = 0, 1, 2
+STATUS = ((QUEUED, "Queued"), (RUNNING, "Running"), (FAILED, "Failed"))
+
+
+class QueuedWork(models.Model):
+    """Bookkeeping for rows that workers claim, retry and finally delete."""
+    status = models.IntegerField(choices=STATUS, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField()
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        abstract = True
+        indexes = [
+            # What the workers poll for: due rows, oldest first
+            models.Index(fields=["status", "run_at"], name="%(class)s_due_idx"),
+        ]
+
+
+class Job(QueuedWork):
+    """A call to a ``jobs.queue.task`` function, waiting for the worker."""
+    objects: Manager = models.Manager()
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"{self.task} #{self.pk}"
+
+
+class OutboundEmail(QueuedWork):
+    """A message spooled by ``jobs.mail.SpoolEmailBackend``, ready to send as is."""
+    objects: Manager = models.Manager()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField()
+    message = models.BinaryField()
+
+    def __str__(self):
+        return f"Email to {', '.join(self.recipients)} #{self.pk}"
@@ -0,0 +1,153 @@
+"""
+A job queue kept in the application database, worked by ``manage.py run_jobs``.
+
+    from jobs.queue import task
+
+    @task
+    def purge_later(*keys):
+        ...
+
+    purge_later.enqueue("listings")
+
+``enqueue`` inserts a ``Job`` row as part of the caller's transaction, so
+workers only see a job once the data it refers to is committed, and a
+rollback takes the job with it. Arguments must be JSON-serialisable.
+
+Workers claim due jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` where the
+database supports it (PostgreSQL), so several can poll without waiting on
+each other's locks. SQLite has no row locks; there each job is claimed with
+an ``UPDATE`` conditional on the row being as it was read, which only one
+worker can win. A failed job is retried with exponential backoff until it
+has had ``max_attempts``, then kept as failed for inspection in the admin.
+A finished job is deleted. A job running for longer than
+``JOBS_LOCK_TIMEOUT`` is taken to belong to a dead worker and claimed again.
+
+``due``, ``claim``, ``release`` and ``unclaim`` work on any ``QueuedWork`` model; the
+outbound email spool (``jobs.mail``) is claimed and retried the same way.
+
+With ``JOBS_EAGER`` (on in the tests) ``enqueue`` runs the task itself once
+the current transaction commits, without a worker.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import FAILED, QUEUED, RUNNING, Job
+
+logger = logging.getLogger(__name__)
+
+# Retries never wait longer than this
+MAX_BACKOFF = 3600
+
+
+def task(func=None, *, max_attempts=None):
+    """Make ``func`` a task; ``func.enqueue(*args, **kwargs)`` queues a call to it."""
+    def register(func):
+        func.task_name = f"{func.__module__}.{func.__qualname__}"
+        func.max_attempts = max_attempts
+        func.enqueue = lambda *args, **kwargs: enqueue(func, args, kwargs)
+        return func
+    return register(func) if func else register
+
+
+def enqueue(func, args=(), kwargs=None, run_at=None):
+    kwargs = kwargs or {}
+    if settings.JOBS_EAGER:
+        # Round-trip the arguments so eager runs catch what a worker would reject
+        args, kwargs = json.loads(json.dumps([list(args), kwargs]))
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return None
+    return Job.objects.create(
+        task=func.task_name,
+        args=list(args),
+        kwargs=kwargs,
+        max_attempts=func.max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def due(model, now):
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    return model.objects.filter(
+        Q(status=QUEUED, run_at__lte=now) | Q(status=RUNNING, locked_at__lt=stale)
+    ).order_by("run_at", "pk")
+
+
+def claim(model, limit):
+    """Mark up to ``limit`` due ``model`` rows as running for this worker and return them."""
+    now = timezone.now()
+    update = {"status": RUNNING, "locked_at": now, "attempts": F("attempts") + 1}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            rows = list(due(model, now).select_for_update(skip_locked=True)[:limit])
+            model.objects.filter(pk__in=[row.pk for row in rows]).update(**update)
+    else:
+        rows = [
+            row for row in due(model, now)[:limit]
+            if model.objects.filter(pk=row.pk, status=row.status, locked_at=row.locked_at).update(**update)
+        ]
+    for row in rows:
+        row.status, row.locked_at, row.attempts = RUNNING, now, row.attempts + 1
+    return rows
+
+
+def claim_jobs(limit):
+    return claim(Job, limit)
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying a job that has failed ``attempts`` times."""
+    return min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF)
+
+
+def release(row, error, retry=True):
+    """Requeue a claimed row that failed, or keep it as failed if out of attempts."""
+    # Matching on locked_at leaves alone a row another worker has reclaimed
+    mine = type(row).objects.filter(pk=row.pk, locked_at=row.locked_at)
+    if not retry or row.attempts >= row.max_attempts:
+        mine.update(status=FAILED, locked_at=None, last_error=error)
+    else:
+        mine.update(
+            status=QUEUED,
+            locked_at=None,
+            run_at=timezone.now() + timedelta(seconds=backoff(row.attempts)),
+            last_error=error,
+        )
+
+
+def unclaim(rows):
+    """Put rows from one ``claim`` back as they were, without using up an attempt."""
+    if rows:
+        type(rows[0]).objects.filter(
+            pk__in=[row.pk for row in rows], locked_at=rows[0].locked_at
+        ).update(status=QUEUED, locked_at=None, attempts=F("attempts") - 1)
+
+
+def finish(row):
+    type(row).objects.filter(pk=row.pk, locked_at=row.locked_at).delete()
+
+
+def run_job(job):
+    """Run a claimed job; return whether it succeeded."""
+    close_old_connections()
+    try:
+        func = import_string(job.task)
+        if getattr(func, "task_name", None) != job.task:
+            raise ImportError(f"{job.task} is not a task")
+        func(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception("Job %s failed (attempt %s of %s)", job, job.attempts, job.max_attempts)
+        release(job, traceback.format_exc())
+        return False
+    else:
+        finish(job)
+        return True
+    finally:
+        close_old_connections()
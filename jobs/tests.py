@@ -0,0 +1,269 @@
+import os
+import signal
+import socketserver
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import FAILED, QUEUED, RUNNING, Job, OutboundEmail
+from .queue import backoff, claim_jobs, task, unclaim
+
+calls = []
+
+
+@task
+def record(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+@task(max_attempts=2)
+def always_fails():
+    raise RuntimeError('boom')
+
+
+@override_settings(JOBS_EAGER=False)
+class TestJobQueue(TestCase):
+    """Tests for queueing, claiming and retrying jobs."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_stores_call(self):
+        job = record.enqueue('a', suffix='!')
+        self.assertEqual(job.task, 'jobs.tests.record')
+        self.assertEqual((job.args, job.kwargs), (['a'], {'suffix': '!'}))
+        self.assertEqual(job.max_attempts, 5)
+        self.assertEqual(calls, [])
+
+    def test_claimed_job_is_not_claimed_again(self):
+        record.enqueue('a')
+        record.enqueue('b')
+        first = claim_jobs(1)
+        self.assertEqual([job.args for job in first], [['a']])
+        self.assertEqual(first[0].status, RUNNING)
+        self.assertEqual(first[0].attempts, 1)
+        self.assertEqual([job.args for job in claim_jobs(5)], [['b']])
+        self.assertEqual(claim_jobs(5), [])
+
+    def test_stale_running_job_is_reclaimed(self):
+        record.enqueue('a')
+        claim_jobs(1)
+        with override_settings(JOBS_LOCK_TIMEOUT=0):
+            self.assertEqual(len(claim_jobs(1)), 1)
+
+    def test_future_job_waits(self):
+        job = record.enqueue('a')
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(claim_jobs(1), [])
+
+    def test_unclaimed_jobs_are_as_before(self):
+        record.enqueue('a')
+        record.enqueue('b')
+        unclaim(claim_jobs(5))
+        self.assertEqual(list(Job.objects.values_list('status', 'attempts', 'locked_at')),
+                         [(QUEUED, 0, None), (QUEUED, 0, None)])
+        self.assertEqual(len(claim_jobs(5)), 2)
+
+    def test_backoff_doubles_and_is_capped(self):
+        self.assertEqual([backoff(n) for n in (1, 2, 3)], [10, 20, 40])
+        self.assertEqual(backoff(30), 3600)
+
+
+@override_settings(JOBS_EAGER=False)
+class TestRunJobsCommand(TransactionTestCase):
+    """Tests for the ``run_jobs`` worker."""
+
+    def setUp(self):
+        calls.clear()
+
+    def run_jobs(self):
+        out = StringIO()
+        call_command('run_jobs', '--once', '--workers', '2', '--poll', '0.01', stdout=out)
+        return out.getvalue().strip()
+
+    def test_runs_and_deletes_jobs(self):
+        for value in 'abc':
+            record.enqueue(value)
+        self.assertEqual(self.run_jobs(), 'Ran 3 jobs, 0 failed.')
+        self.assertEqual(sorted(calls), ['a', 'b', 'c'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_retried_then_kept(self):
+        job = always_fails.enqueue()
+        self.assertEqual(self.run_jobs(), 'Ran 1 jobs, 1 failed.')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        self.assertIn('RuntimeError: boom', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (FAILED, 2))
+
+    def test_only_runs_tasks(self):
+        Job.objects.create(task='os.getcwd', max_attempts=1)
+        self.assertEqual(self.run_jobs(), 'Ran 1 jobs, 1 failed.')
+        self.assertIn('is not a task', Job.objects.get().last_error)
+
+
+class TestEagerJobs(TestCase):
+    """With JOBS_EAGER, as in the tests, jobs run when the transaction commits."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record.enqueue('a')
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ['a'])
+        self.assertFalse(Job.objects.exists())
+
+
+def spool(*recipients):
+    for recipient in recipients:
+        mail.send_mail('Hello', 'Body', 'know-how@example.com', [recipient],
+                       connection=mail.get_connection('jobs.mail.SpoolEmailBackend'))
+
+
+class SMTPRecorder(socketserver.StreamRequestHandler):
+    """Local stand-in for an SMTP server that records what it is sent."""
+    messages = []
+    connections = 0
+    # Replies to RCPT TO for particular recipients, e.g. '550 No such user'
+    replies = {}
+    # Called with each message once it has been received
+    on_message = None
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        type(self).connections += 1
+        self.reply('220 localhost')
+        sender, recipients = None, []
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb == 'MAIL':
+                sender, recipients = command[10:].strip('<>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipient = command[8:].strip('<>')
+                reply = self.replies.get(recipient, '250 OK')
+                if reply.startswith('250'):
+                    recipients.append(recipient)
+                self.reply(reply)
+            elif verb == 'DATA':
+                self.reply('354 Go ahead')
+                data = b''
+                while (line := self.rfile.readline()) not in (b'.\r\n', b''):
+                    data += line
+                self.messages.append((sender, recipients, data))
+                if self.on_message:
+                    type(self).on_message(self.messages[-1])
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                break
+            else:
+                # EHLO, RSET, NOOP
+                self.reply('250 localhost')
+
+
+class TestSpoolEmailBackend(TestCase):
+    """Tests for spooling outbound email instead of sending it in the request."""
+
+    def test_spools_rendered_message(self):
+        spool('"Ann" <ann@example.com>')
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.from_email, 'know-how@example.com')
+        self.assertEqual(email.recipients, ['Ann <ann@example.com>'])
+        self.assertIn(b'Subject: Hello\r\n', bytes(email.message))
+        self.assertEqual((email.status, email.max_attempts), (QUEUED, 5))
+
+    @override_settings(EMAIL_BACKEND='jobs.mail.SpoolEmailBackend')
+    def test_password_reset_is_spooled(self):
+        User.objects.create_user('ann', 'ann@example.com', 'pw')
+        self.client.post(reverse('account_reset_password'), {'email': 'ann@example.com'})
+        self.assertEqual(OutboundEmail.objects.get().recipients, ['ann@example.com'])
+
+
+class TestSendSpooledMail(TransactionTestCase):
+    """Tests for the ``send_spooled_mail`` sender, against a local SMTP stand-in."""
+
+    def setUp(self):
+        SMTPRecorder.messages, SMTPRecorder.connections, SMTPRecorder.replies = [], 0, {}
+        SMTPRecorder.on_message = None
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPRecorder)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        settings = override_settings(EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.server.server_address[1])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def send(self, *args):
+        out = StringIO()
+        call_command('send_spooled_mail', '--once', '--rate', '0', *args, stdout=out)
+        return out.getvalue().strip()
+
+    def test_sends_batches_over_one_connection(self):
+        spool('a@example.com', 'b@example.com', 'c@example.com')
+        self.assertEqual(self.send('--batch-size', '2'), 'Sent 3 emails, 0 failed.')
+        self.assertEqual(SMTPRecorder.connections, 1)
+        self.assertEqual([to for _, to, _ in SMTPRecorder.messages],
+                         [['a@example.com'], ['b@example.com'], ['c@example.com']])
+        self.assertIn(b'Subject: Hello', SMTPRecorder.messages[0][2])
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_rate_limit(self):
+        spool('a@example.com', 'b@example.com', 'c@example.com')
+        start = time.monotonic()
+        self.send('--rate', '20')
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+        self.assertEqual(len(SMTPRecorder.messages), 3)
+
+    def test_temporary_failure_is_retried(self):
+        SMTPRecorder.replies = {'later@example.com': '451 Try again later'}
+        spool('later@example.com', 'b@example.com')
+        self.assertEqual(self.send(), 'Sent 1 emails, 1 failed.')
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), (QUEUED, 1))
+        self.assertGreater(email.run_at, timezone.now() + timedelta(seconds=5))
+        self.assertIn('451', email.last_error)
+
+    def test_permanent_failure_is_not_retried(self):
+        SMTPRecorder.replies = {'nobody@example.com': '550 No such user'}
+        spool('nobody@example.com')
+        self.send()
+        self.assertEqual(OutboundEmail.objects.get().status, FAILED)
+
+    def test_sigterm_puts_rest_of_batch_back(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+        SMTPRecorder.on_message = lambda message: os.kill(os.getpid(), signal.SIGTERM)
+        spool('a@example.com', 'b@example.com', 'c@example.com')
+        out = StringIO()
+        call_command('send_spooled_mail', '--rate', '0', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Sent 1 emails, 0 failed.')
+        self.assertEqual(list(OutboundEmail.objects.values_list('status', 'attempts', 'locked_at')),
+                         [(QUEUED, 0, None), (QUEUED, 0, None)])
+
+    def test_unreachable_server_is_retried(self):
+        spool('a@example.com')
+        self.server.server_close()
+        self.assertEqual(self.send(), 'Sent 0 emails, 1 failed.')
+        self.assertEqual(OutboundEmail.objects.get().status, QUEUED)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class KnowHowConfig(AppConfig):
+    name = 'know_how'
+
+    def ready(self):
+        from know_how import vendor_middleware
+
+        # Before the handler imports the middleware listed in settings
+        vendor_middleware.install()
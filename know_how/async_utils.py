@@ -0,0 +1,29 @@
+"""
+Helpers for the async views served under ASGI (``ASYNC_VIEWS = True``).
+
+Django 4.2 has an async ORM but sync templates, sessions and
+``request.user``; these helpers run those parts in a worker thread.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.http import Http404
+from django.shortcuts import render
+
+
+async def arender(request, template_name, context=None, using=None):
+    """Async ``render()``; fetch data beforehand so rendering does no queries."""
+    return await sync_to_async(render)(request, template_name, context, using=using)
+
+
+async def aget_user(request):
+    """Resolve ``request.user`` without blocking the event loop."""
+    user = await sync_to_async(get_user)(request)
+    request.user = user
+    return user
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
@@ -0,0 +1,285 @@
+"""
+Two-tier cache backend.
+
+A bounded in-process LRU (L1) sits in front of a shared cache (L2, any
+configured alias: Redis in production, a file cache locally). Every write
+bumps a generation counter in L2 and logs the changed key under that
+generation; each worker checks the counter at most every
+``SYNC_INTERVAL`` seconds and evicts the logged keys from its own L1. If
+the log has a gap, the worker drops its whole L1 instead.
+"""
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .timing import count, timed
+
+GENERATION_KEY = "tiered:generation"
+LOG_KEY_PREFIX = "tiered:invalidated:"
+CLEAR_MARKER = "*"
+
+_MISSING = object()
+
+# Per-process L1 stores, keyed by LOCATION; Django builds one backend
+# instance per thread, but all threads of a worker share the same L1.
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class _L1Store:
+    """LRU storage, statistics and sync state shared by one worker."""
+
+    def __init__(self):
+        self.data = OrderedDict()  # key -> (expiry, pickled value)
+        self.lock = threading.Lock()
+        self.stats = {"l1": Counter(), "l2": Counter()}
+        self.generation = None
+        self.next_sync = 0.0
+        self.own_generations = set()
+
+
+class TieredCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._l2_alias = options.get("L2", "shared")
+        self._l1_timeout = options.get("L1_TIMEOUT", 30)
+        self._sync_interval = options.get("SYNC_INTERVAL", 1.0)
+        self._log_timeout = options.get(
+            "LOG_TIMEOUT", self._l1_timeout + self._sync_interval + 60
+        )
+        with _stores_lock:
+            self._store = _stores.setdefault(location, _L1Store())
+
+    @property
+    def _l2(self):
+        return caches[self._l2_alias]
+
+    # L1 helpers
+
+    def _l1_get(self, key):
+        store = self._store
+        with store.lock:
+            entry = store.data.get(key)
+            if entry is not None:
+                expiry, pickled = entry
+                if expiry > time.time():
+                    store.data.move_to_end(key)
+                    store.stats["l1"]["hits"] += 1
+                    return pickle.loads(pickled)
+                del store.data[key]
+            store.stats["l1"]["misses"] += 1
+        return _MISSING
+
+    def _l1_set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        expiry = time.time() + self._l1_timeout
+        backend_expiry = self.get_backend_timeout(timeout)
+        if backend_expiry is not None:
+            expiry = min(expiry, backend_expiry)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        store = self._store
+        with store.lock:
+            store.data[key] = (expiry, pickled)
+            store.data.move_to_end(key)
+            while len(store.data) > self._max_entries:
+                store.data.popitem(last=False)
+
+    def _l1_delete(self, *keys):
+        store = self._store
+        with store.lock:
+            for key in keys:
+                store.data.pop(key, None)
+
+    def _record_l2(self, hits, misses):
+        stats = self._store.stats["l2"]
+        stats["hits"] += hits
+        stats["misses"] += misses
+
+    # Cross-worker invalidation
+
+    def _publish(self, *keys):
+        """Log ``keys`` as changed so other workers evict them from L1."""
+        l2 = self._l2
+        l2.add(GENERATION_KEY, 0, timeout=None)
+        last = l2.incr(GENERATION_KEY, len(keys))
+        first = last - len(keys) + 1
+        l2.set_many(
+            {
+                f"{LOG_KEY_PREFIX}{generation}": key
+                for generation, key in zip(range(first, last + 1), keys)
+            },
+            timeout=self._log_timeout,
+        )
+        with self._store.lock:
+            self._store.own_generations.update(range(first, last + 1))
+
+    def _sync(self):
+        store = self._store
+        now = time.monotonic()
+        if now < store.next_sync:
+            return
+        store.next_sync = now + self._sync_interval
+        current = self._l2.get(GENERATION_KEY, 0)
+        with store.lock:
+            seen, store.generation = store.generation, current
+        if seen is None or current == seen:
+            return
+        if current < seen:
+            # The shared cache was flushed; nothing in L1 can be trusted
+            self._clear_l1()
+            return
+        generations = range(seen + 1, current + 1)
+        with store.lock:
+            foreign = [g for g in generations if g not in store.own_generations]
+            store.own_generations.difference_update(generations)
+        if not foreign:
+            return
+        logged = self._l2.get_many([f"{LOG_KEY_PREFIX}{g}" for g in foreign])
+        keys = set(logged.values())
+        if len(logged) < len(foreign) or CLEAR_MARKER in keys:
+            self._clear_l1()
+        else:
+            self._l1_delete(*keys)
+
+    def _clear_l1(self):
+        with self._store.lock:
+            self._store.data.clear()
+
+    # Cache API
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        cache_key = self.make_and_validate_key(key, version=version)
+        added = self._l2.add(key, value, self._l2_timeout(timeout), version=version)
+        if added:
+            self._l1_set(cache_key, value, timeout)
+        return added
+
+    def get(self, key, default=None, version=None):
+        with timed("cache"):
+            value = self._get(key, version)
+        if value is _MISSING:
+            count("cache_miss")
+            return default
+        count("cache_hit")
+        return value
+
+    def _get(self, key, version):
+        cache_key = self.make_and_validate_key(key, version=version)
+        self._sync()
+        value = self._l1_get(cache_key)
+        if value is not _MISSING:
+            return value
+        value = self._l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._record_l2(0, 1)
+            return value
+        self._record_l2(1, 0)
+        self._l1_set(cache_key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        cache_key = self.make_and_validate_key(key, version=version)
+        self._l2.set(key, value, self._l2_timeout(timeout), version=version)
+        self._l1_set(cache_key, value, timeout)
+        self._publish(cache_key)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.make_and_validate_key(key, version=version)
+        return self._l2.touch(key, self._l2_timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        cache_key = self.make_and_validate_key(key, version=version)
+        self._l1_delete(cache_key)
+        deleted = self._l2.delete(key, version=version)
+        self._publish(cache_key)
+        return deleted
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        cache_key = self.make_and_validate_key(key, version=version)
+        value = self._l2.incr(key, delta, version=version)
+        self._l1_delete(cache_key)
+        self._publish(cache_key)
+        return value
+
+    def get_many(self, keys, version=None):
+        with timed("cache"):
+            found = self._get_many(keys, version)
+        count("cache_hit", len(found))
+        count("cache_miss", len(keys) - len(found))
+        return found
+
+    def _get_many(self, keys, version):
+        self._sync()
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._l1_get(self.make_and_validate_key(key, version=version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = self._l2.get_many(missing, version=version)
+            self._record_l2(len(fetched), len(missing) - len(fetched))
+            for key, value in fetched.items():
+                self._l1_set(self.make_and_validate_key(key, version=version), value)
+            found.update(fetched)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self._l2.set_many(data, self._l2_timeout(timeout), version=version)
+        cache_keys = []
+        for key, value in data.items():
+            if key not in failed:
+                cache_key = self.make_and_validate_key(key, version=version)
+                self._l1_set(cache_key, value, timeout)
+                cache_keys.append(cache_key)
+        if cache_keys:
+            self._publish(*cache_keys)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        cache_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not cache_keys:
+            return
+        self._l1_delete(*cache_keys)
+        self._l2.delete_many(keys, version=version)
+        self._publish(*cache_keys)
+
+    def clear(self):
+        self._clear_l1()
+        # Carry the generation over so other workers see it move forward
+        generation = self._l2.get(GENERATION_KEY, 0)
+        self._l2.clear()
+        self._l2.set(GENERATION_KEY, generation, timeout=None)
+        self._publish(CLEAR_MARKER)
+
+    def _l2_timeout(self, timeout):
+        # Keep this cache's TIMEOUT when the caller relies on the default
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def stats(self):
+        """Return per-tier hit and miss counts for this worker."""
+        store = self._store
+        with store.lock:
+            return {
+                "l1": {
+                    "hits": store.stats["l1"]["hits"],
+                    "misses": store.stats["l1"]["misses"],
+                    "entries": len(store.data),
+                    "max_entries": self._max_entries,
+                },
+                "l2": {
+                    "hits": store.stats["l2"]["hits"],
+                    "misses": store.stats["l2"]["misses"],
+                },
+            }
@@ -0,0 +1,191 @@
+"""
+Brotli or gzip response compression, negotiated per request.
+
+Django's ``GZipMiddleware`` only speaks gzip and holds streamed chunks back
+until gzip has a block to emit. ``CompressionMiddleware`` instead:
+
+- picks ``br`` or ``gzip`` from ``Accept-Encoding``, honouring q-values;
+- compresses streaming responses chunk by chunk, flushing after each one
+  so server-sent events still arrive when they are sent;
+- only compresses text-like content types, leaving images, fonts and
+  archives (already compressed) alone;
+- leaves bodies under ``COMPRESSION_MIN_SIZE`` bytes as they are.
+
+Responses that already have a ``Content-Encoding`` pass through untouched,
+which covers the ``.br``/``.gz`` static files WhiteNoise serves, and so do
+partial (``206``, ``Content-Range``) responses, whose byte ranges refer to
+the uncompressed body.
+
+Against BREACH, gzip output carries the same random-length padding as
+Django's ``GZipMiddleware`` (a file name of up to ``GZIP_MAX_PADDING``
+bytes in the header). Brotli has no such field, so a response that used
+the CSRF token gets gzip even where the browser prefers Brotli.
+"""
+import secrets
+from gzip import GzipFile
+
+import brotli
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import StreamingBuffer
+
+from .middleware import AsyncCapableMiddleware
+
+# Dynamic pages are compressed on every request: these levels keep most of
+# the size win of the maximum settings at a fraction of the CPU
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+# As GZipMiddleware's max_random_bytes
+GZIP_MAX_PADDING = 100
+
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/ld+json",
+    "application/manifest+json",
+    "application/xhtml+xml",
+    "application/xml",
+    "image/svg+xml",
+}
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data, flush=False):
+        output = self._compressor.process(data)
+        return output + self._compressor.flush() if flush else output
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class GzipEncoder:
+    def __init__(self):
+        self._buffer = StreamingBuffer()
+        self._file = GzipFile(
+            filename=b"a" * secrets.randbelow(GZIP_MAX_PADDING),
+            mode="wb",
+            compresslevel=GZIP_LEVEL,
+            fileobj=self._buffer,
+            mtime=0,
+        )
+
+    def compress(self, data, flush=False):
+        self._file.write(data)
+        if flush:
+            # Z_SYNC_FLUSH
+            self._file.flush()
+        return self._buffer.read()
+
+    def finish(self):
+        self._file.close()
+        return self._buffer.read()
+
+
+ENCODERS = {"br": BrotliEncoder, "gzip": GzipEncoder}
+# The encoders that pad their output, for responses with a CSRF token
+PADDED_ENCODERS = {"gzip": GzipEncoder}
+
+
+def negotiate(accept_encoding, encoders=ENCODERS):
+    """Return the preferred of ``encoders`` the client accepts, or None."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+    wildcard = weights.get("*", 0.0)
+    # On a tie, the order of ENCODERS (Brotli first) decides
+    ranked = sorted(encoders, key=lambda coding: -weights.get(coding, wildcard))
+    best = ranked[0]
+    return best if weights.get(best, wildcard) > 0 else None
+
+
+def compress_body(coding, data):
+    encoder = ENCODERS[coding]()
+    return encoder.compress(data) + encoder.finish()
+
+
+def compress_stream(coding, chunks):
+    encoder = ENCODERS[coding]()
+    for chunk in chunks:
+        if data := encoder.compress(chunk, flush=True):
+            yield data
+    yield encoder.finish()
+
+
+async def acompress_stream(coding, chunks):
+    encoder = ENCODERS[coding]()
+    async for chunk in chunks:
+        if data := encoder.compress(chunk, flush=True):
+            yield data
+    yield encoder.finish()
+
+
+def is_compressible(response):
+    if response.has_header("Content-Encoding"):
+        return False
+    if response.status_code == 206 or response.has_header("Content-Range"):
+        return False
+    if "no-transform" in response.get("Cache-Control", ""):
+        return False
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    if not (content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES):
+        return False
+    if response.streaming:
+        length = response.get("Content-Length")
+        return length is None or int(length) >= settings.COMPRESSION_MIN_SIZE
+    return len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+
+class CompressionMiddleware(AsyncCapableMiddleware):
+    """Compress text responses with Brotli or gzip, streaming ones included."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        # get_token() sets this when the page embeds the CSRF token
+        needs_padding = request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        coding = negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""),
+            PADDED_ENCODERS if needs_padding else ENCODERS,
+        )
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(coding, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(coding, response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress_body(coding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # The representation changed, so a strong ETag must become weak
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = coding
+        return response
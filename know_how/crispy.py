@@ -0,0 +1,33 @@
+"""
+``FormHelper`` that caches the rendered layout of pristine unbound forms.
+
+Used through ``know_how.forms.CrispyLayoutMixin``, which shares one helper
+per form class and variant, so the cache is effectively keyed on those.
+Only the layout is cached: crispy still renders the ``<form>`` wrapper, CSRF
+token and errors per request.
+"""
+from crispy_forms.helper import FormHelper
+from crispy_forms.utils import TEMPLATE_PACK
+from django.conf import settings
+from django.utils import translation
+
+
+class CachedLayoutHelper(FormHelper):
+    def __init__(self, layout):
+        super().__init__()
+        self.layout = layout
+        self._rendered = {}
+
+    def render_layout(self, form, context, template_pack=TEMPLATE_PACK):
+        # Under DEBUG, template edits show up without a restart
+        if settings.DEBUG or not getattr(form, "is_pristine", False):
+            return super().render_layout(form, context, template_pack)
+        key = (template_pack, form.prefix, form.auto_id, translation.get_language())
+        cached = self._rendered.get(key)
+        if cached is None:
+            html = super().render_layout(form, context, template_pack)
+            cached = self._rendered.setdefault(key, (html, frozenset(form.rendered_fields)))
+        html, rendered_fields = cached
+        form.rendered_fields = set(rendered_fields)
+        form.crispy_field_template = self.field_template
+        return html
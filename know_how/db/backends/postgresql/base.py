@@ -0,0 +1,68 @@
+"""
+PostgreSQL backend that records connection setup time and can return
+connections to an in-process pool instead of closing them.
+
+Enabled for any Postgres ``DATABASE_URL``; the pool is used when the
+database settings carry a non-zero ``POOL_SIZE``.
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from know_how.db.pool import ConnectionPool, timed_connect
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _reset(connection):
+    status = connection.info.transaction_status
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        raise ConnectionError("connection is broken")
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+def _ping(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    if not connection.autocommit:
+        connection.rollback()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        size = self.settings_dict.get("POOL_SIZE", 0)
+        if not size:
+            return None
+        # Keyed by pid so a pool created before gunicorn forks is never shared
+        key = (self.alias, os.getpid())
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(size, reset=_reset, ping=_ping)
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        pool = self.pool
+        if pool is None:
+            return timed_connect(lambda: connect(conn_params))
+        connection = pool.acquire(lambda: connect(conn_params))
+        # Normally set by the parent as a side effect of connecting
+        self.isolation_level = base.IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", base.IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.release(self.connection)
@@ -0,0 +1,107 @@
+"""
+Connection setup metrics and a small in-process connection pool.
+
+Django opens one connection per thread; with threaded gunicorn workers
+and ``CONN_MAX_AGE = 0`` that means a fresh TCP + TLS handshake for every
+request. The pool keeps up to ``size`` idle connections per worker
+process and hands them to whichever thread asks next.
+"""
+import os
+import threading
+import time
+from collections import Counter, deque
+
+# Totals for this process, exported by the metrics endpoint
+connection_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def record_connect(seconds):
+    with _stats_lock:
+        connection_stats["connects"] += 1
+        connection_stats["connect_seconds"] += seconds
+
+
+def connection_stats_snapshot():
+    with _stats_lock:
+        return dict(connection_stats)
+
+
+def timed_connect(connect):
+    """Call ``connect()`` and record how long the connection took to set up."""
+    started = time.perf_counter()
+    connection = connect()
+    record_connect(time.perf_counter() - started)
+    return connection
+
+
+class ConnectionPool:
+    """
+    Thread-safe LIFO pool of idle DB-API connections.
+
+    ``reset`` is called on release and should leave the connection idle
+    (or raise if it cannot); ``ping`` is run on checkout for connections
+    that sat idle longer than ``ping_after`` seconds.
+    """
+
+    def __init__(self, size, reset=None, ping=None, ping_after=30):
+        self.size = size
+        self._reset = reset
+        self._ping = ping
+        self._ping_after = ping_after
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def acquire(self, connect):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, released_at = self._idle.pop()
+            if self._is_usable(connection, released_at):
+                with _stats_lock:
+                    connection_stats["pool_hits"] += 1
+                return connection
+            self._discard(connection)
+        with _stats_lock:
+            connection_stats["pool_misses"] += 1
+        return timed_connect(connect)
+
+    def release(self, connection):
+        try:
+            if self._reset is not None:
+                self._reset(connection)
+        except Exception:
+            self._discard(connection)
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self._discard(connection)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def _is_usable(self, connection, released_at):
+        if getattr(connection, "closed", False):
+            return False
+        if self._ping is None or time.monotonic() - released_at < self._ping_after:
+            return True
+        try:
+            self._ping(connection)
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with _stats_lock:
+            connection_stats["discarded"] += 1
@@ -0,0 +1,144 @@
+"""
+Per-request query inspection: N+1 detection, slow-query plans and budgets.
+
+``QueryInspectorMiddleware`` records every query a request runs, then:
+
+- flags SQL shapes repeated ``QUERY_REPEAT_THRESHOLD`` or more times, the
+  signature of a template looping over an unjoined relation;
+- logs queries slower than ``SLOW_QUERY_MS`` with their ``EXPLAIN`` plan;
+- checks the view's ``query_budget``.
+
+Everything is logged as a warning. When ``QUERY_BUDGET_RAISE`` is set (it
+is under the test runner) an exceeded budget raises
+``QueryBudgetExceeded`` instead, so a regression fails the view's tests.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from ..middleware import AsyncCapableMiddleware
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+\b")
+_IN_LIST = re.compile(r"\bIN \([^()]*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """Reduce ``sql`` to its shape: literals, placeholders and IN lists elided."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql).replace("%s", "?")
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def query_budget(limit):
+    """Declare the most queries one request to this view may run."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+class QueryLog:
+    """``execute_wrapper`` that records the queries of one request."""
+
+    def __init__(self):
+        self.executed = Counter()
+        self.slow = []
+        self._explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - started) * 1000
+        self.executed[sql] += 1
+        if duration_ms >= settings.SLOW_QUERY_MS and not many:
+            plan = self.explain(context["connection"], sql, params)
+            self.slow.append((duration_ms, sql, plan))
+        return result
+
+    def explain(self, connection, sql, params):
+        if not sql.lstrip().upper().startswith("SELECT"):
+            return None
+        self._explaining = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+                return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+        except DatabaseError as exc:
+            return f"(EXPLAIN failed: {exc})"
+        finally:
+            self._explaining = False
+
+    @property
+    def count(self):
+        return sum(self.executed.values())
+
+    def repeated(self, threshold):
+        """Return ``{fingerprint: count}`` for shapes run ``threshold`` times or more."""
+        shapes = Counter()
+        for sql, times in self.executed.items():
+            shapes[fingerprint(sql)] += times
+        return {shape: times for shape, times in shapes.items() if times >= threshold}
+
+
+def view_budget(request):
+    """The ``query_budget`` of the view that handled ``request``, if any."""
+    match = request.resolver_match
+    if match is None:
+        return None
+    view_class = getattr(match.func, "view_class", None)
+    return getattr(match.func, "query_budget", getattr(view_class, "query_budget", None))
+
+
+class QueryInspectorMiddleware(AsyncCapableMiddleware):
+    """Record each request's queries and report N+1s, slow queries and budgets."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        log = QueryLog()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            response = self.get_response(request)
+        return self.report(request, response, log)
+
+    async def __acall__(self, request):
+        log = QueryLog()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            response = await self.get_response(request)
+        return self.report(request, response, log)
+
+    def report(self, request, response, log):
+        request.query_count = log.count
+
+        for shape, times in log.repeated(settings.QUERY_REPEAT_THRESHOLD).items():
+            logger.warning("Possible N+1 on %s: %d x %s", request.path, times, shape)
+        for duration_ms, sql, plan in log.slow:
+            logger.warning(
+                "Slow query on %s (%.0f ms): %s\n%s", request.path, duration_ms, sql, plan
+            )
+        budget = view_budget(request)
+        if budget is not None and log.count > budget:
+            message = f"{request.path} ran {log.count} queries; its budget is {budget}"
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
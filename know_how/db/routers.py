@@ -0,0 +1,116 @@
+"""
+Read-replica routing.
+
+Views decorated with ``read_from_replica`` read from one of the
+``DATABASE_REPLICAS`` on GET and HEAD requests. Everything else reads from
+the primary. As soon as a request writes, ``ReplicaPinMiddleware`` sets a
+browser-session cookie that keeps that visitor on the primary, so users
+always see their own writes despite replication lag.
+"""
+import asyncio
+import contextvars
+import random
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from ..middleware import AsyncCapableMiddleware
+
+PIN_COOKIE = "read_primary"
+
+# Writes to these apps are bookkeeping, not user data worth pinning for
+UNPINNED_APPS = {"sessions", "jobs"}
+
+_request_state = contextvars.ContextVar("replica_request_state", default=None)
+
+
+class _RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.use_replica = False
+        self.wrote = False
+
+
+def read_from_replica(view_func):
+    """Allow safe requests to this view to read from a replica."""
+    def allow_replica(request):
+        state = _request_state.get()
+        if state is not None and request.method in ("GET", "HEAD") and not state.pinned:
+            state.use_replica = True
+
+    if asyncio.iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            allow_replica(request)
+            return await view_func(request, *args, **kwargs)
+        return _wrapped_view
+
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        allow_replica(request)
+        return view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+class ReplicaRouter:
+    """Send replica-eligible reads to a random replica and all writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if (
+            settings.DATABASE_REPLICAS
+            and state is not None
+            and state.use_replica
+            and not state.wrote
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None and model._meta.app_label not in UNPINNED_APPS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinMiddleware(AsyncCapableMiddleware):
+    """Track writes per request and pin writers to the primary for their session."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = _RequestState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.pin(request, response, state)
+
+    async def __acall__(self, request):
+        state = _RequestState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.pin(request, response, state)
+
+    def pin(self, request, response, state):
+        if state.wrote and not state.pinned:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
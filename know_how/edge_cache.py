@@ -0,0 +1,143 @@
+"""
+Shared (CDN / reverse proxy) caching for pages with no per-user content.
+
+Views wrapped with ``shared_cache`` render the anonymous version of the
+navbar and hero buttons; ``static/js/index.js`` then fills the
+``data-fragment`` placeholders from the ``personal_fragments`` view.
+``SharedCacheMiddleware`` sits above the session middleware and turns the
+response public only when the view itself never touched the session and
+nothing is setting a cookie.
+"""
+import asyncio
+import logging
+import urllib.error
+import urllib.request
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from jobs.queue import task
+
+from .middleware import AsyncCapableMiddleware
+
+logger = logging.getLogger(__name__)
+
+SURROGATE_KEY_HEADER = "Surrogate-Key"
+
+
+class PurgeFailed(Exception):
+    pass
+
+
+def shared_cache(*surrogate_keys, s_maxage=None):
+    """
+    Mark a view as shared-cacheable and tag it with surrogate keys.
+
+    Keys may reference the view's URL kwargs, e.g. ``"page-{slug}"``.
+    """
+    def decorator(view_func):
+        def tag(request, response, kwargs):
+            if (
+                request.method in ("GET", "HEAD")
+                and response.status_code == 200
+                and not request.session.accessed
+            ):
+                response.shared_cache_max_age = (
+                    settings.EDGE_CACHE_S_MAXAGE if s_maxage is None else s_maxage
+                )
+                response[SURROGATE_KEY_HEADER] = " ".join(
+                    key.format(**kwargs) for key in surrogate_keys
+                )
+            return response
+
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                request.shared_cache = True
+                response = await view_func(request, *args, **kwargs)
+                if hasattr(response, "render") and not response.is_rendered:
+                    await sync_to_async(response.render)()
+                return tag(request, response, kwargs)
+            return _wrapped_view
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            request.shared_cache = True
+            response = view_func(request, *args, **kwargs)
+            # Render lazy responses now so template reads of the session count
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+            return tag(request, response, kwargs)
+        return _wrapped_view
+    return decorator
+
+
+class SharedCacheMiddleware(AsyncCapableMiddleware):
+    """Finalize caching headers for responses produced by ``shared_cache`` views."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.finalize(self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.finalize(await self.get_response(request))
+
+    def finalize(self, response):
+        max_age = getattr(response, "shared_cache_max_age", None)
+        if max_age is None:
+            return response
+        if response.cookies:
+            # A Set-Cookie must never be stored by a shared cache
+            del response[SURROGATE_KEY_HEADER]
+            patch_cache_control(response, private=True)
+            patch_vary_headers(response, ("Cookie",))
+            return response
+        # The session was only read by middleware (e.g. allauth's dangling
+        # login check), never by the page itself, so the body is the same
+        # for every visitor.
+        if response.has_header("Vary"):
+            vary = [
+                header.strip()
+                for header in response["Vary"].split(",")
+                if header.strip().lower() != "cookie"
+            ]
+            if vary:
+                response["Vary"] = ", ".join(vary)
+            else:
+                del response["Vary"]
+        patch_cache_control(response, public=True, max_age=0, s_maxage=max_age)
+        return response
+
+
+def purge(*keys):
+    """
+    Ask the edge cache to drop everything tagged with any of ``keys``.
+
+    Sends ``EDGE_CACHE_PURGE_METHOD`` to ``EDGE_CACHE_PURGE_URL`` with a
+    ``Surrogate-Key`` header, which Fastly, Varnish (xkey) and most
+    stand-in proxies understand. Failures are logged, never raised.
+    """
+    url = settings.EDGE_CACHE_PURGE_URL
+    if not url or not keys:
+        return False
+    req = urllib.request.Request(
+        url,
+        method=settings.EDGE_CACHE_PURGE_METHOD,
+        headers={SURROGATE_KEY_HEADER: " ".join(keys)},
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=settings.EDGE_CACHE_PURGE_TIMEOUT):
+            return True
+    except (urllib.error.URLError, OSError) as exc:
+        logger.warning("Edge cache purge of %s failed: %s", keys, exc)
+        return False
+
+
+@task
+def purge_later(*keys):
+    """``purge`` from the job worker, off the request path and retried on failure."""
+    if settings.EDGE_CACHE_PURGE_URL and not purge(*keys):
+        raise PurgeFailed(f"Edge cache purge of {keys} failed")
@@ -0,0 +1,54 @@
+"""
+Crispy layouts built once per form class instead of once per form.
+
+A form using ``CrispyLayoutMixin`` must define its layout in a
+``build_layout(cls, variant)`` classmethod; a form class without one fails
+when it is defined. The mixin builds one ``FormHelper`` per form class and variant
+(``"create"`` for a new instance, ``"edit"`` for a saved one) the first time
+a form of that kind is rendered, and every later form shares it. Crispy is
+only imported at that point, so it stays out of start-up.
+
+The shared helper also caches the rendered layout of unbound forms, which
+are identical for every request (the review form on each profile page, the
+empty listing form). Bound forms, and forms filled from an instance or
+``initial``, are rendered in full each time through the same helper.
+"""
+
+
+class CrispyLayoutMixin:
+    # Not an abc.ABC: that would clash with Django's form metaclass
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, "build_layout", None)):
+            raise TypeError(f"{cls.__qualname__} must define a build_layout classmethod")
+
+    def __init__(self, *args, **kwargs):
+        # Form and ModelForm both take ``initial`` as the fifth argument
+        initial = kwargs.get("initial", args[4] if len(args) > 4 else None)
+        self.has_initial = bool(initial)
+        super().__init__(*args, **kwargs)
+
+    @property
+    def layout_variant(self):
+        instance = getattr(self, "instance", None)
+        return "edit" if getattr(instance, "pk", None) else "create"
+
+    @property
+    def is_pristine(self):
+        """Whether this form renders like any other unbound one of its kind."""
+        return not (self.is_bound or self.has_initial or self.layout_variant == "edit")
+
+    @property
+    def helper(self):
+        cls = type(self)
+        # Looked up in the class's own namespace so subclasses get their own
+        helpers = cls.__dict__.get("_crispy_helpers")
+        if helpers is None:
+            helpers = {}
+            setattr(cls, "_crispy_helpers", helpers)
+        variant = self.layout_variant
+        helper = helpers.get(variant)
+        if helper is None:
+            from .crispy import CachedLayoutHelper
+            helper = helpers.setdefault(variant, CachedLayoutHelper(cls.build_layout(variant)))
+        return helper
@@ -0,0 +1,27 @@
+"""
+Which template engine renders the hot pages: ``"django"`` or ``"jinja2"``.
+
+``HOT_TEMPLATE_ENGINE`` picks it for every hot page. A single view can be
+pinned to an engine instead:
+
+- class-based views, through ``HotTemplateMixin``: set ``template_engine``
+  on the class or pass it to ``as_view(template_engine="jinja2")``;
+- function views take a ``template_engine`` keyword, which a URL pattern
+  can supply: ``path("", view, {"template_engine": "jinja2"})``.
+
+``None`` means the setting.
+"""
+from django.conf import settings
+
+
+def hot_engine(engine=None):
+    return engine or settings.HOT_TEMPLATE_ENGINE
+
+
+class HotTemplateMixin:
+    template_engine = None
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        # TemplateResponseMixin renders with this
+        self.template_engine = hot_engine(self.template_engine)
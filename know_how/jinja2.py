@@ -0,0 +1,89 @@
+"""
+Jinja2 environment for the hot page templates in the ``jinja2/`` directories.
+
+It provides what those templates use from Django's template language:
+``url()``, ``static()``, ``tailwind_css()``, ``crispy(form)`` and
+``has_image(field)`` globals,
+plus the Django filters they apply. ``request``, ``csrf_input`` and
+``csrf_token``, and the context processors' ``user`` and ``messages``,
+come from Django's Jinja2 backend.
+
+Views choose the engine with ``HOT_TEMPLATE_ENGINE`` or their own
+``template_engine`` (``know_how.hot_templates``); the Django templates
+stay the reference and the tests check the two render alike.
+"""
+from crispy_forms.utils import render_crispy_form
+from django.template import defaultfilters
+from django.template.backends.jinja2 import Jinja2
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.utils.formats import localize
+from django.utils.timezone import template_localtime
+from django.urls import reverse
+from jinja2 import Environment, pass_context
+from markupsafe import Markup
+from tailwind.templatetags import tailwind_tags
+
+from .timing import TimedTemplate
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def tailwind_css():
+    return Markup(render_to_string("tailwind/tags/css.html", tailwind_tags.tailwind_css()))
+
+
+def has_image(field):
+    """
+    ``"placeholder" not in field.url`` as Django's ``{% if %}`` evaluates it:
+    False, not an error, when the URL cannot be built.
+    """
+    try:
+        return "placeholder" not in field.url
+    except Exception:
+        return False
+
+
+def date(value, arg=None):
+    # Django converts to local time before calling ``expects_localtime`` filters
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+@pass_context
+def crispy(context, form, helper=None):
+    return Markup(render_crispy_form(form, helper, {
+        "request": context.get("request"),
+        "csrf_token": context.get("csrf_token"),
+    }))
+
+
+def finalize(value):
+    # How Django prints a ``{{ value }}``: dates in local time, numbers and
+    # dates in the active locale's format
+    return localize(template_localtime(value))
+
+
+def environment(**options):
+    env = Environment(finalize=finalize, **options)
+    env.globals.update(
+        url=url, static=static, tailwind_css=tailwind_css, crispy=crispy, has_image=has_image
+    )
+    env.filters.update(
+        date=date,
+        floatformat=defaultfilters.floatformat,
+        pluralize=defaultfilters.pluralize,
+        truncatewords=defaultfilters.truncatewords,
+    )
+    return env
+
+
+class TimedJinja2(Jinja2):
+    """Jinja2 backend that times each top-level render for Server-Timing."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
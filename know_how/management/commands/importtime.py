@@ -0,0 +1,98 @@
+"""
+Report where start-up time goes, using CPython's ``-X importtime``.
+
+    python manage.py importtime
+    python manage.py importtime --import know_how.asgi --limit 30
+
+A fresh interpreter runs ``django.setup()`` and imports the given modules
+(the URLconf by default, which is what a worker loads before its first
+request). Self times are summed per top-level package and the slowest
+individual modules are listed.
+"""
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+STARTUP_SCRIPT = """
+import importlib, os, sys
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", {settings_module!r})
+import django
+django.setup()
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+"""
+
+
+def startup_command(modules, importtime=False):
+    """Interpreter command line that boots Django and imports ``modules``."""
+    script = STARTUP_SCRIPT.format(settings_module=os.environ["DJANGO_SETTINGS_MODULE"])
+    flags = ["-X", "importtime"] if importtime else []
+    return [sys.executable, *flags, "-c", script, *modules]
+
+
+def parse_importtime(output):
+    """Return ``(module, self_us, cumulative_us)`` rows from importtime output."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue  # not an import, or the header line
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def by_package(rows):
+    totals = Counter()
+    for name, self_us, _ in rows:
+        totals[name.partition(".")[0]] += self_us
+    return totals
+
+
+def profile_startup(modules):
+    """Run one cold start; return ``(wall_ms, rows)``."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        startup_command(modules, importtime=True),
+        capture_output=True, text=True, cwd=settings.BASE_DIR,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode:
+        raise CommandError(result.stderr.strip().splitlines()[-1])
+    return wall_ms, parse_importtime(result.stderr)
+
+
+class Command(BaseCommand):
+    help = "Profile module import time for a cold start of the site."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--import", dest="modules", action="append", metavar="MODULE",
+            help="Module to import after django.setup() (default: the URLconf).",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=15,
+            help="Number of packages and modules to list.",
+        )
+
+    def handle(self, *args, modules=None, limit=15, **options):
+        modules = modules or [settings.ROOT_URLCONF]
+        wall_ms, rows = profile_startup(modules)
+        total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+
+        self.stdout.write(
+            f"Cold start importing {', '.join(modules)}: {wall_ms:.0f} ms wall, "
+            f"{total_ms:.0f} ms in {len(rows)} imports"
+        )
+        self.stdout.write("\nBy top-level package (self time):")
+        for package, self_us in by_package(rows).most_common(limit):
+            self.stdout.write(f"  {self_us / 1000:8.1f} ms  {package}")
+        self.stdout.write("\nSlowest modules (self / cumulative):")
+        for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[1])[:limit]:
+            self.stdout.write(
+                f"  {self_us / 1000:8.1f} / {cumulative_us / 1000:8.1f} ms  {name}"
+            )
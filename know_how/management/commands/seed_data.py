@@ -0,0 +1,281 @@
+"""
+Generate a large synthetic dataset for load and performance testing.
+
+    python manage.py seed_data --users 200000 --listings 1000000 --reviews 5000000
+
+Rows are built in batches and written with ``bulk_create`` using explicit
+primary keys, so foreign keys are known without reading anything back and
+no ``post_save`` handlers run (profiles are bulk-created alongside users).
+Popularity follows a Zipf-like long tail: a few tutors own many listings
+and collect most reviews. ``--seed`` makes runs reproducible.
+"""
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from listings.models import Listing, TimeSlot
+from profiles.models import UserProfile
+from reviews.models import Review
+from site_content.models import NavigationList, Page
+
+WORDS = (
+    "guitar piano python cooking pottery spanish french chess yoga drawing "
+    "photography baking knitting calculus physics chemistry writing poetry "
+    "gardening woodwork running swimming singing violin drums design excel "
+    "finance history climbing sailing welding coding painting dance"
+).split()
+LEVELS = ["Beginner", "Intermediate", "Advanced", "Weekend", "Evening", "Crash course in"]
+PLACES = ["London", "Leeds", "Bristol", "Glasgow", "Cardiff", "Online", "Belfast", "York"]
+# Ratings skew high, as they do on most review sites
+RATING_WEIGHTS = [1, 1, 1, 2, 3, 5, 8, 12, 14, 10]
+PASSWORD = "password"
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def zipf_weights(count, exponent):
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def next_id(model):
+    return (model.objects.aggregate(highest=Max("pk"))["highest"] or 0) + 1
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let generated ``created_on``/``updated_on`` values through ``auto_now``."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = "Bulk-load synthetic users, listings, time slots, reviews and pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tutor-share", type=float, default=0.2,
+                            help="Fraction of users who own listings.")
+        parser.add_argument("--listings", type=int, default=5000)
+        parser.add_argument("--slots-per-listing", type=float, default=3,
+                            help="Average time slots per listing.")
+        parser.add_argument("--reviews", type=int, default=20000)
+        parser.add_argument("--pages", type=int, default=20)
+        parser.add_argument("--nav-lists", type=int, default=3)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        started = time.perf_counter()
+
+        with explicit_timestamps(User, UserProfile, Listing, TimeSlot, Review, Page):
+            user_ids = self.create_users(options["users"])
+            tutor_ids = user_ids[:max(1, int(len(user_ids) * options["tutor_share"]))]
+            listing_ids = self.create_listings(options["listings"], tutor_ids)
+            self.create_time_slots(listing_ids, options["slots_per_listing"])
+            self.create_reviews(options["reviews"], tutor_ids, user_ids)
+            self.create_pages(options["pages"], options["nav_lists"])
+
+        self.reset_sequences()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded in {time.perf_counter() - started:.1f}s"
+        ))
+
+    # Helpers
+
+    def past(self, days=365):
+        return self.now - timedelta(seconds=self.random.randrange(days * 86400))
+
+    def write(self, model, rows):
+        """``bulk_create`` rows in batches inside one transaction; return the count."""
+        started = time.perf_counter()
+        total = 0
+        with transaction.atomic():
+            for batch in batched(rows, self.batch_size):
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+                total += len(batch)
+        self.stdout.write(
+            f"  {model._meta.verbose_name_plural}: {total} in {time.perf_counter() - started:.1f}s"
+        )
+        return total
+
+    def reset_sequences(self):
+        """Move primary-key sequences past the explicit IDs (no-op on SQLite)."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, UserProfile, Listing, TimeSlot, Review, Page, NavigationList]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    # Generators
+
+    def create_users(self, count):
+        first_id = next_id(User)
+        password = make_password(PASSWORD)
+        user_ids = list(range(first_id, first_id + count))
+
+        def users():
+            for user_id in user_ids:
+                joined = self.past()
+                yield User(
+                    id=user_id, username=f"seed_{user_id}", password=password,
+                    first_name=self.random.choice(WORDS).title(), last_name=f"Seed{user_id}",
+                    email=f"seed_{user_id}@example.com", date_joined=joined,
+                )
+
+        def profiles():
+            profile_id = next_id(UserProfile)
+            for offset, user_id in enumerate(user_ids):
+                created = self.past()
+                yield UserProfile(
+                    id=profile_id + offset, user_id=user_id,
+                    bio=" ".join(self.random.choices(WORDS, k=20)),
+                    location=self.random.choice(PLACES),
+                    expertise_areas=", ".join(self.random.sample(WORDS, 3)),
+                    years_experience=self.random.randint(0, 30),
+                    created_on=created, updated_on=created,
+                )
+
+        self.write(User, users())
+        self.write(UserProfile, profiles())
+        return user_ids
+
+    def create_listings(self, count, tutor_ids):
+        first_id = next_id(Listing)
+        listing_ids = list(range(first_id, first_id + count))
+        # A few prolific tutors, a long tail with one or two listings
+        tutor_weights = list(itertools.accumulate(zipf_weights(len(tutor_ids), 1.1)))
+
+        def listings():
+            for batch in batched(listing_ids, self.batch_size):
+                tutors = self.random.choices(tutor_ids, cum_weights=tutor_weights, k=len(batch))
+                for listing_id, tutor_id in zip(batch, tutors):
+                    subject = self.random.choice(WORDS)
+                    title = f"{self.random.choice(LEVELS)} {subject}"
+                    created = self.past()
+                    yield Listing(
+                        id=listing_id, title=title.capitalize(),
+                        slug=f"{title.lower().replace(' ', '-')}-{listing_id}",
+                        tutor_id=tutor_id,
+                        short_description=f"Learn {subject} with a friendly local tutor.",
+                        content="<p>" + " ".join(self.random.choices(WORDS, k=60)) + "</p>",
+                        location=self.random.choice(PLACES),
+                        session_time=f"{self.random.randint(1, 3)} hours",
+                        status=1 if self.random.random() < 0.9 else 0,
+                        created_on=created, updated_on=created,
+                    )
+
+        self.write(Listing, listings())
+        return listing_ids
+
+    def create_time_slots(self, listing_ids, average):
+        first_id = next_id(TimeSlot)
+
+        def slots():
+            slot_id = first_id
+            for listing_id in listing_ids:
+                for _ in range(self.random.randint(0, round(average * 2))):
+                    start = self.now + timedelta(
+                        days=self.random.randint(1, 90), hours=self.random.randint(8, 20)
+                    )
+                    spaces = self.random.randint(5, 30)
+                    yield TimeSlot(
+                        id=slot_id, listing_id=listing_id, start_time=start,
+                        end_time=start + timedelta(hours=self.random.randint(1, 3)),
+                        event_spaces=spaces,
+                        event_spaces_available=self.random.randint(0, spaces),
+                        status=1, created_on=self.now, updated_on=self.now,
+                    )
+                    slot_id += 1
+
+        self.write(TimeSlot, slots())
+
+    def create_reviews(self, count, tutor_ids, user_ids):
+        first_id = next_id(Review)
+        weights = zipf_weights(len(tutor_ids), 1.2)
+        # One review per (tutor, author): each tutor's authors are a run of
+        # consecutive users from a random offset, which can never repeat
+        max_per_tutor = len(user_ids) - 1
+
+        def reviews():
+            review_id = first_id
+            remaining, remaining_weight = count, sum(weights)
+            for tutor_id, weight in zip(tutor_ids, weights):
+                # Whatever a capped tutor can't take passes down the tail
+                wanted = min(max_per_tutor, remaining, round(remaining * weight / remaining_weight))
+                remaining -= wanted
+                remaining_weight -= weight
+                offset = self.random.randrange(len(user_ids))
+                authors = (
+                    user_ids[(offset + step) % len(user_ids)] for step in range(wanted + 1)
+                )
+                authors = [author for author in authors if author != tutor_id][:wanted]
+                ratings = self.random.choices(range(1, 11), weights=RATING_WEIGHTS, k=len(authors))
+                for author_id, rating in zip(authors, ratings):
+                    created = self.past()
+                    yield Review(
+                        id=review_id, target_user_id=tutor_id, author_id=author_id,
+                        rating=rating, title=f"{rating}/10 from a student",
+                        body=" ".join(self.random.choices(WORDS, k=25)),
+                        created_on=created, updated_on=created,
+                    )
+                    review_id += 1
+
+        self.write(Review, reviews())
+
+    def create_pages(self, count, nav_lists):
+        first_id = next_id(Page)
+        page_ids = list(range(first_id, first_id + count))
+
+        def pages():
+            for page_id in page_ids:
+                created = self.past()
+                yield Page(
+                    id=page_id, title=f"{self.random.choice(WORDS).title()} guide",
+                    slug=f"seed-page-{page_id}", excerpt="A guide.",
+                    content="<p>" + " ".join(self.random.choices(WORDS, k=200)) + "</p>",
+                    status=1, created_on=created, updated_on=created,
+                )
+
+        self.write(Page, pages())
+        if not nav_lists or not page_ids:
+            return
+        first_list = next_id(NavigationList)
+        lists = [
+            NavigationList(id=first_list + index, list_name=f"Seed links {index + 1}")
+            for index in range(nav_lists)
+        ]
+        self.write(NavigationList, lists)
+        Through = NavigationList.list.through
+        self.write(Through, (
+            Through(navigationlist_id=nav.id, page_id=page_id)
+            for nav in lists
+            for page_id in self.random.sample(page_ids, min(len(page_ids), 8))
+        ))
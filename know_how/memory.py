@@ -0,0 +1,151 @@
+"""
+Worker memory diagnostics: RSS, GC state, cache sizes and tracemalloc diffs.
+
+``/_memory/`` (staff only) reports on whichever worker served it:
+
+- ``?trace=start`` starts tracemalloc, keeping ``frames`` frames per
+  allocation (default 1; more frames means more overhead).
+- Each later request diffs a new snapshot against the previous one and
+  lists the call sites whose allocations grew the most.
+- ``?trace=stop`` ends tracing.
+
+To target one particular worker, send it ``SIGUSR2``
+(``kill -USR2 <pid>``; the handler is installed by gunicorn.conf.py). It
+logs the same report.
+"""
+import gc
+import json
+import logging
+import resource
+import signal
+import threading
+import tracemalloc
+
+from django.core.cache import caches
+from django.http import Http404, JsonResponse
+from django.template import engines
+from django.views.decorators.cache import never_cache
+
+logger = logging.getLogger(__name__)
+
+# tracemalloc's own limit
+MAX_TRACE_FRAMES = 65535
+
+TOP_ALLOCATIONS = 25
+IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<unknown>")
+
+_previous = None
+_lock = threading.Lock()
+
+
+def rss_kib():
+    """Current resident set size; peak RSS where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def cached_templates():
+    """Templates held by each engine's cached loader."""
+    sizes = {}
+    for engine in engines.all():
+        for loader in getattr(getattr(engine, "engine", None), "template_loaders", []):
+            if hasattr(loader, "get_template_cache"):
+                sizes[engine.name] = len(loader.get_template_cache)
+    return sizes
+
+
+def allocation_diff(limit=TOP_ALLOCATIONS):
+    """Snapshot and diff against the previous snapshot of this worker."""
+    global _previous
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+    )
+    with _lock:
+        previous, _previous = _previous, snapshot
+    current, peak = tracemalloc.get_traced_memory()
+    report = {"traced_kib": current // 1024, "peak_kib": peak // 1024, "top": []}
+    if previous is None:
+        stats = snapshot.statistics("traceback")
+        report["top"] = [
+            {"site": _site(stat.traceback), "size_kib": stat.size // 1024, "count": stat.count}
+            for stat in stats[:limit]
+        ]
+    else:
+        stats = snapshot.compare_to(previous, "traceback")
+        report["top"] = [
+            {
+                "site": _site(stat.traceback),
+                "size_kib": stat.size // 1024,
+                "size_diff_kib": stat.size_diff // 1024,
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ]
+    return report
+
+
+def _site(traceback):
+    return [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+
+
+def stop_tracing():
+    global _previous
+    tracemalloc.stop()
+    with _lock:
+        _previous = None
+
+
+def memory_report():
+    """Everything this worker knows about its own memory use."""
+    default_cache = caches["default"]
+    return {
+        "rss_kib": rss_kib(),
+        "gc": {
+            "counts": gc.get_count(),
+            "thresholds": gc.get_threshold(),
+            "frozen": gc.get_freeze_count(),
+            "generations": gc.get_stats(),
+        },
+        "cached_templates": cached_templates(),
+        "l1_cache": default_cache.stats()["l1"] if hasattr(default_cache, "stats") else None,
+        "tracemalloc": allocation_diff(),
+    }
+
+
+@never_cache
+def memory(request):
+    """Staff-only memory report for the worker serving this request."""
+    if not request.user.is_staff:
+        raise Http404
+    trace = request.GET.get("trace")
+    if trace == "start" and not tracemalloc.is_tracing():
+        frames = request.GET.get("frames", "1")
+        if not frames.isdecimal() or not 1 <= int(frames) <= MAX_TRACE_FRAMES:
+            return JsonResponse(
+                {"error": f"frames must be a number from 1 to {MAX_TRACE_FRAMES}"}, status=400
+            )
+        tracemalloc.start(int(frames))
+    elif trace == "stop":
+        stop_tracing()
+    return JsonResponse(memory_report())
+
+
+def log_memory_report(signum=None, frame=None):
+    """Signal handler: log the report from a thread, outside the handler."""
+    def log():
+        logger.warning("Memory report: %s", json.dumps(memory_report()))
+    thread = threading.Thread(target=log, daemon=True)
+    thread.start()
+    return thread
+
+
+def install_signal_handler(signum=signal.SIGUSR2):
+    signal.signal(signum, log_memory_report)
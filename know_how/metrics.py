@@ -0,0 +1,141 @@
+"""
+Prometheus metrics, scraped from ``/metrics``.
+
+``MetricsMiddleware`` records per-request latency (labelled by URL name,
+method and status), the number of queries each view ran and an in-flight
+gauge. After each request it also folds this worker's ``TieredCache`` and
+connection-pool counters into Prometheus counters.
+
+Under gunicorn every worker writes to ``PROMETHEUS_MULTIPROC_DIR`` (set in
+gunicorn.conf.py) and the endpoint merges all workers' files. Only staff
+or callers presenting ``METRICS_TOKEN`` as a bearer token may read it.
+"""
+import os
+import threading
+import time
+from secrets import compare_digest
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+from .db.pool import connection_stats_snapshot
+from .middleware import AsyncCapableMiddleware
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from the request reaching Django to the response leaving it.",
+    ["view", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries run per request.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled.",
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Lookups in the tiered cache by tier and result.",
+    ["tier", "result"],
+)
+DB_CONNECTIONS = Counter(
+    "db_connection_events_total",
+    "New connections, pool hits and misses, and discarded pooled connections.",
+    ["event"],
+)
+DB_CONNECT_SECONDS = Counter(
+    "db_connect_seconds_total",
+    "Time spent opening database connections.",
+)
+
+CONNECTION_EVENTS = ("connects", "pool_hits", "pool_misses", "discarded")
+
+# Counter values already exported by this process
+_exported = {}
+_exported_lock = threading.Lock()
+
+
+def _export(key, value, counter):
+    with _exported_lock:
+        delta = value - _exported.get(key, 0)
+        _exported[key] = value
+    if delta > 0:
+        counter.inc(delta)
+
+
+def export_worker_stats():
+    """Fold the cache and connection counters of this process into Prometheus."""
+    cache = caches["default"]
+    if hasattr(cache, "stats"):
+        for tier, stats in cache.stats().items():
+            for result in ("hits", "misses"):
+                _export((tier, result), stats[result], CACHE_REQUESTS.labels(tier, result))
+    stats = connection_stats_snapshot()
+    for event in CONNECTION_EVENTS:
+        _export(event, stats.get(event, 0), DB_CONNECTIONS.labels(event))
+    _export("connect_seconds", stats.get("connect_seconds", 0), DB_CONNECT_SECONDS)
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Record request latency, queries and concurrency for ``/metrics``."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        IN_FLIGHT.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+        return self.observe(request, response, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        IN_FLIGHT.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+        return self.observe(request, response, started)
+
+    def observe(self, request, response, started):
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        REQUEST_LATENCY.labels(view, request.method, response.status_code).observe(
+            time.perf_counter() - started
+        )
+        query_count = getattr(request, "query_count", None)
+        if query_count is not None:
+            REQUEST_QUERIES.labels(view).observe(query_count)
+        export_worker_stats()
+        return response
+
+
+def metrics(request):
+    """Prometheus exposition of every worker's metrics."""
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if not (
+        (token and compare_digest(authorization, f"Bearer {token}"))
+        or request.user.is_staff
+    ):
+        raise PermissionDenied
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
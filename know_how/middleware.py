@@ -0,0 +1,34 @@
+"""
+Middleware that runs natively under both WSGI and ASGI.
+
+Django runs a middleware that is not ``async_capable`` in a thread under
+ASGI, and once one middleware is sync-only every middleware outside it
+stays sync as well, so a single sync middleware deep in the chain sends
+the whole request through a thread and drives the async views with
+``async_to_sync``. ``AsyncCapableMiddleware`` is the base for this
+project's middleware, which has an ``__acall__`` for the async mode;
+``know_how.vendor_middleware`` does the same for WhiteNoise and allauth.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+def match_handler_mode(middleware, get_response):
+    """Run ``middleware`` async if the handler it wraps is async."""
+    middleware.async_mode = iscoroutinefunction(get_response)
+    if middleware.async_mode:
+        # Django then awaits it instead of running it in a thread
+        markcoroutinefunction(middleware)
+
+
+class AsyncCapableMiddleware:
+    """
+    Base for middleware with a sync ``__call__`` and an async ``__acall__``.
+
+    ``__call__`` hands over with ``if self.async_mode: return self.__acall__(request)``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        match_handler_mode(self, get_response)
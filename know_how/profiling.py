@@ -0,0 +1,195 @@
+"""
+On-demand profiling of a single request, for staff only.
+
+Add ``?_profile=1`` (or send ``X-Profile: 1``) to any URL while logged in
+as staff. The request runs under a stack sampler, and the collapsed stacks
+are saved to ``PROFILER_DIR`` in the ``frame;frame;frame count`` format
+that flamegraph.pl and speedscope read. Use ``_profile=cprofile`` for a
+deterministic cProfile dump (``.prof``, for snakeviz or pstats) instead.
+Any other value (``0``, ``false``) leaves profiling off. The response
+carries a ``Link`` to the file; only the newest ``PROFILER_KEEP`` files
+are kept.
+
+Requests without the switch never look at the user, and requests from
+non-staff users ignore it.
+
+Under WSGI the sampler watches the thread running the request. Under ASGI
+a request hops between the event loop and ``sync_to_async`` threads, so
+the sampler records every thread, and ``cprofile`` everything the event
+loop runs meanwhile: profile on a quiet worker.
+"""
+import cProfile
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.urls import reverse
+
+from .async_utils import aget_user
+from .middleware import AsyncCapableMiddleware
+
+SWITCH_PARAM = "_profile"
+SWITCH_HEADER = "HTTP_X_PROFILE"
+PROFILE_NAME = re.compile(r"^[\w-]+\.(collapsed|prof)$")
+# Switch values that turn profiling on, and the mode each one picks
+PROFILE_MODES = {"1": "sample", "sample": "sample", "cprofile": "cprofile"}
+
+# The switch interval is process-wide, and samplers on concurrent requests
+# overlap: the first to start saves it and the last to stop restores it
+_switch_lock = threading.Lock()
+_active_samplers = 0
+_saved_switch_interval = None
+
+
+class StackSampler:
+    """
+    Sample one thread's stack every ``interval`` seconds from a helper thread.
+
+    With ``thread_id=None`` every other thread is sampled.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        global _active_samplers, _saved_switch_interval
+        with _switch_lock:
+            if not _active_samplers:
+                _saved_switch_interval = sys.getswitchinterval()
+            _active_samplers += 1
+            # Let the sampler get the GIL as often as it wants to sample
+            sys.setswitchinterval(min(sys.getswitchinterval(), self.interval))
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active_samplers
+        self._stop.set()
+        self._thread.join()
+        with _switch_lock:
+            _active_samplers -= 1
+            if not _active_samplers:
+                sys.setswitchinterval(_saved_switch_interval)
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frames = {self.thread_id: frames.get(self.thread_id)}
+            for thread_id, frame in frames.items():
+                if frame is not None and thread_id != me:
+                    self.stacks[collapse(frame)] += 1
+
+    def write(self, path):
+        with open(path, "w") as output:
+            for stack, samples in self.stacks.most_common():
+                output.write(f"{stack} {samples}\n")
+
+
+def collapse(frame):
+    """Render a stack root-first as ``module.function;module.function``."""
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}.{frame.f_code.co_qualname}".replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class ProfilerMiddleware(AsyncCapableMiddleware):
+    """Profile requests that carry the switch when the user is staff."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        mode = profile_mode(request)
+        if not mode or not request.user.is_staff:
+            return self.get_response(request)
+
+        path = new_profile_path(mode)
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            response = profiler.runcall(self.get_response, request)
+            profiler.dump_stats(path)
+        else:
+            with StackSampler(threading.get_ident(), settings.PROFILER_INTERVAL) as sampler:
+                response = self.get_response(request)
+            sampler.write(path)
+        return link_profile(response, path)
+
+    async def __acall__(self, request):
+        mode = profile_mode(request)
+        if not mode or not (await aget_user(request)).is_staff:
+            return await self.get_response(request)
+
+        path = new_profile_path(mode)
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+            profiler.dump_stats(path)
+        else:
+            with StackSampler(None, settings.PROFILER_INTERVAL) as sampler:
+                response = await self.get_response(request)
+            sampler.write(path)
+        return link_profile(response, path)
+
+
+def profile_mode(request):
+    """``"sample"`` or ``"cprofile"`` if the request asks to be profiled, else None."""
+    return PROFILE_MODES.get(request.META.get(SWITCH_HEADER) or request.GET.get(SWITCH_PARAM))
+
+
+def new_profile_path(mode):
+    directory = Path(settings.PROFILER_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    prune_profiles(directory, settings.PROFILER_KEEP - 1)
+    stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    return directory / f"{stem}.{'prof' if mode == 'cprofile' else 'collapsed'}"
+
+
+def prune_profiles(directory, keep):
+    """Delete all but the newest ``keep`` profiles in ``directory``."""
+    profiles = sorted(
+        (path for path in directory.iterdir() if PROFILE_NAME.match(path.name)),
+        # Names start with the time they were written
+        key=lambda path: path.name,
+        reverse=True,
+    )
+    for path in profiles[max(keep, 0):]:
+        # Another worker may be pruning at the same time
+        path.unlink(missing_ok=True)
+
+
+def link_profile(response, path):
+    url = reverse("profile_result", args=[path.name])
+    response["Link"] = f'<{url}>; rel="profile"'
+    response["X-Profile-Url"] = url
+    return response
+
+
+def profile_result(request, name):
+    """Serve a saved profile to staff."""
+    if not request.user.is_staff or not PROFILE_NAME.match(name):
+        raise Http404
+    path = Path(settings.PROFILER_DIR) / name
+    if not path.is_file():
+        raise Http404
+    content_type = "text/plain; charset=utf-8" if name.endswith(".collapsed") else None
+    return FileResponse(
+        open(path, "rb"), as_attachment=content_type is None, content_type=content_type
+    )
@@ -37,7 +37,9 @@ ALLOWED_HOSTS = ['know-how-ac9183a9af5a.herokuapp.com', '.herokuapp.com', '127.0
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Admin modules (and the summernote widgets they pull in) are
+    # discovered from urls.py, so commands that never load URLs skip them
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -58,6 +60,8 @@ INSTALLED_APPS = [
     'profiles.apps.ProfilesConfig',
     'reviews',
     'site_content',
+    'jobs',
+    'know_how',
 ]
 
 SITE_ID = 1
@@ -71,13 +75,22 @@ if DEBUG:
     INSTALLED_APPS += ['django_browser_reload']
  
 
+# Everything here is async-capable, so under ASGI a request reaches the
+# async views without a thread hop (know_how/middleware.py)
 MIDDLEWARE = [
+    'know_how.metrics.MetricsMiddleware',
+    'know_how.timing.ServerTimingMiddleware',
+    'know_how.db.queries.QueryInspectorMiddleware',
+    'know_how.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'know_how.vendor_middleware.WhiteNoiseMiddleware',
+    'know_how.edge_cache.SharedCacheMiddleware',
+    'know_how.db.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'know_how.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -91,11 +104,22 @@ if DEBUG:
 
 CSRF_TRUSTED_ORIGINS = ['https://*.herokuapp.com']
 
+# Brotli/gzip for text responses at least this many bytes long
+# (know_how/compression.py)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '500'))
+
+# Shared (CDN / reverse proxy) caching of pages without per-user content
+EDGE_CACHE_S_MAXAGE = int(os.environ.get('EDGE_CACHE_S_MAXAGE', '300'))
+EDGE_CACHE_PURGE_URL = os.environ.get('EDGE_CACHE_PURGE_URL')
+EDGE_CACHE_PURGE_METHOD = os.environ.get('EDGE_CACHE_PURGE_METHOD', 'PURGE')
+EDGE_CACHE_PURGE_TIMEOUT = 2
+
 ROOT_URLCONF = 'know_how.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'know_how.timing.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -107,10 +131,46 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        # Jinja2 copies of the hottest pages (know_how/jinja2.py)
+        'BACKEND': 'know_how.jinja2.TimedJinja2',
+        'NAME': 'jinja2',
+        'DIRS': [BASE_DIR / 'jinja2'],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'environment': 'know_how.jinja2.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
 ]
 
+# Engine for the listing grid and profile pages: 'django' or 'jinja2'; a view
+# can pin its own (know_how/hot_templates.py)
+HOT_TEMPLATE_ENGINE = os.environ.get('HOT_TEMPLATE_ENGINE', 'django')
+
 WSGI_APPLICATION = 'know_how.wsgi.application'
 
+# Bearer token that lets a scraper read /metrics (staff can always)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Staff can profile a request with ?_profile=1 (know_how/profiling.py)
+PROFILER_DIR = os.environ.get('PROFILER_DIR', BASE_DIR / '.profiles')
+PROFILER_INTERVAL = 0.001
+# Older profiles are deleted as new ones are written
+PROFILER_KEEP = int(os.environ.get('PROFILER_KEEP', '50'))
+
+# Fraction of requests that get a Server-Timing header (know_how/timing.py)
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.environ.get('SERVER_TIMING_SAMPLE_RATE', '1' if DEBUG else '0.01')
+)
+
+# Serve the hot read pages from async views; only worthwhile under ASGI
+# (see gunicorn.conf.py)
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -121,19 +181,173 @@ WSGI_APPLICATION = 'know_how.wsgi.application'
 #         'NAME': BASE_DIR / 'db.sqlite3',
 #     }
 # }
+# Keep connections open between requests (or pool them per worker with
+# DATABASE_POOL_SIZE) instead of paying a TLS handshake on every request.
+# Under ASGI (ASYNC_VIEWS) only the pool reuses connections.
+DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', '0'))
+
+
+def database_from_url(url):
+    """Build a DATABASES entry with persistent or pooled connections."""
+    config = dj_database_url.parse(url)
+    config['CONN_HEALTH_CHECKS'] = True
+    config['CONN_MAX_AGE'] = int(os.environ.get('CONN_MAX_AGE', '600'))
+    if ASYNC_VIEWS:
+        # Under ASGI every sync_to_async hop may land on a different thread,
+        # each of which would keep its own persistent connection open until
+        # the database refuses more; pool them with DATABASE_POOL_SIZE instead
+        config['CONN_MAX_AGE'] = 0
+    if config['ENGINE'] in (
+        'django.db.backends.postgresql',
+        'django.db.backends.postgresql_psycopg2',
+    ):
+        config['ENGINE'] = 'know_how.db.backends.postgresql'
+        if DATABASE_POOL_SIZE:
+            # Connections go back to the pool at the end of each request
+            config['POOL_SIZE'] = DATABASE_POOL_SIZE
+            config['CONN_MAX_AGE'] = 0
+    return config
+
+
 DATABASES = {
-    'default': dj_database_url.parse(os.environ.get("DATABASE_URL"))
+    'default': database_from_url(os.environ.get("DATABASE_URL"))
 }
 
+# Read replicas for list and detail pages (comma-separated URLs). Locally a
+# copy of the SQLite file, or the same file, works as a stand-in.
+DATABASE_REPLICAS = []
+for index, url in enumerate(
+    url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+):
+    alias = f'replica_{index}'
+    DATABASES[alias] = database_from_url(url.strip())
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['know_how.db.routers.ReplicaRouter']
+
+# Query inspection (know_how/db/queries.py): log N+1 patterns, slow
+# queries with their plans, and views over their query budget. Budgets
+# fail the tests instead of just logging.
+SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', '200'))
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', '5'))
+QUERY_BUDGET_RAISE = 'test' in sys.argv
+
 if 'test' in sys.argv:
     DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
     
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# A per-worker LRU (L1) in front of the shared cache (L2): Redis in
+# production, a file cache locally.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+    if REDIS_URL.startswith('rediss://'):
+        # Heroku Redis uses self-signed certificates
+        SHARED_CACHE['OPTIONS'] = {'ssl_cert_reqs': None}
+elif 'test' in sys.argv:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / '.cache'),
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'know_how.cache.TieredCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'L2': 'shared',
+            'MAX_ENTRIES': int(os.environ.get('CACHE_L1_MAX_ENTRIES', '1000')),
+            'L1_TIMEOUT': int(os.environ.get('CACHE_L1_TIMEOUT', '30')),
+            'SYNC_INTERVAL': float(os.environ.get('CACHE_SYNC_INTERVAL', '1')),
+        },
+    },
+    'shared': SHARED_CACHE,
+}
+
+# Sessions
+# https://docs.djangoproject.com/en/4.2/topics/http/sessions/
+# 'cached_db' (the default) reads sessions from the shared cache and only
+# falls back to the table on a miss; 'signed_cookies' keeps small sessions
+# in the cookie and stores nothing server-side; 'db' is Django's default.
+# The shared tier rather than the tiered cache, because a per-worker L1
+# could keep serving a session for SYNC_INTERVAL after logout. Clear out
+# expired rows with `manage.py clear_expired_sessions`.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_MODE', 'cached_db')]
+SESSION_CACHE_ALIAS = 'shared'
+
+# Flash messages ride in their own cookie, so a messages.success() after a
+# form post doesn't write the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 CSRF_TRUSTED_ORIGINS = [
     "http://127.0.0.1:8000/",
     "https://*.herokuapp.com"
 ]
 
+# Load request.user with its profile in one query and cache it briefly in
+# the shared cache (profiles/backends.py). ModelBackend stays listed so
+# sessions created before the switch remain valid.
+AUTHENTICATION_BACKENDS = [
+    'profiles.backends.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', '30'))
+
+# Background jobs (jobs/queue.py), worked by `manage.py run_jobs`, the
+# Procfile's worker process. JOBS_EAGER runs each job in the enqueuing
+# process once its transaction commits instead, as the tests do.
+JOBS_EAGER = os.environ.get('JOBS_EAGER', str('test' in sys.argv)) == 'True'
+JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', '4'))
+JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', '1'))
+JOBS_MAX_ATTEMPTS = 5
+# Seconds before the first retry, doubling with each failed attempt
+JOBS_RETRY_BACKOFF = 10
+# A job still running after this many seconds is presumed dead and rerun
+JOBS_LOCK_TIMEOUT = 600
+
+# Outbound email (jobs/mail.py). Requests only spool messages to the
+# database; `manage.py send_spooled_mail`, the Procfile's mail process,
+# sends them through the SMTP server below in batches over one connection.
+# The test runner swaps in Django's in-memory backend.
+EMAIL_BACKEND = 'jobs.mail.SpoolEmailBackend'
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False') == 'True'
+EMAIL_TIMEOUT = 30
+EMAIL_SPOOL_BATCH_SIZE = int(os.environ.get('EMAIL_SPOOL_BATCH_SIZE', '50'))
+# Messages per second, to stay inside the provider's sending limits
+EMAIL_SPOOL_RATE = float(os.environ.get('EMAIL_SPOOL_RATE', '10'))
+EMAIL_SPOOL_MAX_ATTEMPTS = 5
+
+# Listing popularity (listings/popularity.py). Each worker buffers listing
+# page views and flushes them at most every VIEW_COUNT_FLUSH_INTERVAL
+# seconds (the tests flush by hand); `manage.py update_trending`, from the
+# scheduler, turns the last TRENDING_WINDOW hours of views into scores that
+# halve every TRENDING_HALF_LIFE hours.
+VIEW_COUNT_FLUSH_INTERVAL = (
+    None if 'test' in sys.argv else float(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', '5'))
+)
+TRENDING_HALF_LIFE = 24
+TRENDING_WINDOW = 7 * 24
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -174,6 +388,21 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static'), ]
 
+# collectstatic writes content-hashed copies plus .br and .gz variants;
+# WhiteNoise serves the hashed names with a year-long immutable
+# Cache-Control, so repeat visits never revalidate them. The tests render
+# templates without running collectstatic, so they keep plain names.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+if 'test' in sys.argv:
+    STORAGES['staticfiles']['BACKEND'] = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
 
 
 # Media files
@@ -0,0 +1,865 @@
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, SimpleTestCase, override_settings
+from django.urls import ResolverMatch, reverse
+from django.contrib.auth.models import User
+from django.db import models
+
+from .cache import TieredCache
+from .compression import CompressionMiddleware, negotiate
+from .db.pool import ConnectionPool, connection_stats
+from .db.queries import QueryBudgetExceeded, QueryInspectorMiddleware, fingerprint, query_budget
+from .db.routers import PIN_COOKIE, ReplicaRouter, _RequestState, _request_state
+from .edge_cache import PurgeFailed, purge, purge_later
+from .management.commands.importtime import by_package, parse_importtime
+from .memory import log_memory_report, stop_tracing
+from .profiling import StackSampler
+from .timing import RequestTimer, _current
+
+
+class PurgeRecorder(BaseHTTPRequestHandler):
+    """Local stand-in for a caching proxy that records purge requests."""
+    purged = []
+
+    def do_PURGE(self):
+        self.purged.append(self.headers['Surrogate-Key'])
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestEdgeCachePurge(TestCase):
+    """Tests for surrogate-key purges sent to the edge cache."""
+
+    def setUp(self):
+        PurgeRecorder.purged = []
+        self.server = HTTPServer(('127.0.0.1', 0), PurgeRecorder)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.purge_url = f'http://127.0.0.1:{self.server.server_port}/'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_purge_sends_surrogate_keys(self):
+        with override_settings(EDGE_CACHE_PURGE_URL=self.purge_url):
+            self.assertTrue(purge('listings', 'page-about'))
+        self.assertEqual(PurgeRecorder.purged, ['listings page-about'])
+
+    def test_purge_is_noop_without_url(self):
+        self.assertFalse(purge('listings'))
+        self.assertEqual(PurgeRecorder.purged, [])
+
+    def test_failed_purge_raises_for_retry(self):
+        self.server.server_close()
+        with override_settings(EDGE_CACHE_PURGE_URL=self.purge_url):
+            with self.assertRaises(PurgeFailed):
+                purge_later('listings')
+
+    def test_saving_listing_purges_feed(self):
+        from listings.models import Listing
+        user = User.objects.create_user(username='tutor', password='testpass123')
+        with override_settings(EDGE_CACHE_PURGE_URL=self.purge_url):
+            with self.captureOnCommitCallbacks(execute=True):
+                Listing.objects.create(
+                    title='Guitar', slug='guitar', tutor=user, content='x'
+                )
+        self.assertEqual(PurgeRecorder.purged, ['listings'])
+
+    @override_settings(JOBS_EAGER=False)
+    def test_no_purge_job_without_url(self):
+        from jobs.models import Job
+        from listings.models import Listing
+        from site_content.models import Page
+        user = User.objects.create_user(username='tutor', password='testpass123')
+        Listing.objects.create(title='Guitar', slug='guitar', tutor=user, content='x')
+        Page.objects.create(title='About', slug='about')
+        self.assertFalse(Job.objects.exists())
+
+
+class TestPersonalFragments(TestCase):
+    """Tests for the per-user fragments used by shared-cached pages."""
+
+    def test_anonymous_fragments(self):
+        response = self.client.get(reverse('personal_fragments'), {'slot': 'nav'})
+        self.assertIn('private', response['Cache-Control'])
+        fragments = response.json()['fragments']
+        self.assertEqual(list(fragments), ['nav'])
+        self.assertIn('Login', fragments['nav'])
+
+    def test_authenticated_fragments(self):
+        User.objects.create_user(username='tutor', password='testpass123')
+        self.client.login(username='tutor', password='testpass123')
+        response = self.client.get(
+            reverse('personal_fragments'), {'slot': ['nav', 'hero']}
+        )
+        fragments = response.json()['fragments']
+        self.assertIn('/profile/tutor/', fragments['nav'])
+        self.assertIn('Offer your skills', fragments['hero'])
+
+
+class TestTieredCache(SimpleTestCase):
+    """Tests for the L1/L2 cache and cross-worker invalidation."""
+
+    def setUp(self):
+        caches['shared'].clear()
+        # Two "workers" with separate L1 stores sharing the same L2
+        options = {'L2': 'shared', 'MAX_ENTRIES': 2, 'SYNC_INTERVAL': 0}
+        self.worker_a = TieredCache(f'a-{self.id()}', {'OPTIONS': options})
+        self.worker_b = TieredCache(f'b-{self.id()}', {'OPTIONS': options})
+
+    def test_get_fills_l1_from_l2(self):
+        self.worker_a.set('greeting', 'hello')
+        self.assertEqual(self.worker_b.get('greeting'), 'hello')
+        self.assertEqual(self.worker_b.get('greeting'), 'hello')
+        stats = self.worker_b.stats()
+        self.assertEqual(stats['l1'], {'hits': 1, 'misses': 1, 'entries': 1, 'max_entries': 2})
+        self.assertEqual(stats['l2'], {'hits': 1, 'misses': 0})
+
+    def test_write_invalidates_other_workers_l1(self):
+        self.worker_a.set('greeting', 'hello')
+        self.worker_b.get('greeting')
+        self.worker_a.set('greeting', 'bonjour')
+        self.assertEqual(self.worker_b.get('greeting'), 'bonjour')
+        self.worker_a.delete('greeting')
+        self.assertIsNone(self.worker_b.get('greeting'))
+
+    def test_own_writes_stay_in_l1(self):
+        self.worker_a.set('greeting', 'hello')
+        self.worker_a.get('greeting')
+        self.assertEqual(self.worker_a.stats()['l1']['hits'], 1)
+
+    def test_clear_drops_every_l1(self):
+        self.worker_a.set('greeting', 'hello')
+        self.worker_b.get('greeting')
+        self.worker_a.clear()
+        self.assertIsNone(self.worker_b.get('greeting'))
+
+    def test_l1_is_bounded_lru(self):
+        for key in ('one', 'two', 'three'):
+            self.worker_a.set(key, key)
+        self.assertEqual(self.worker_a.stats()['l1']['entries'], 2)
+        self.assertEqual(self.worker_a.get('one'), 'one')  # refilled from L2
+
+    def test_get_many_and_incr(self):
+        self.worker_a.set_many({'x': 1, 'y': 2})
+        self.assertEqual(self.worker_b.get_many(['x', 'y', 'z']), {'x': 1, 'y': 2})
+        self.assertEqual(self.worker_a.incr('x'), 2)
+        self.assertEqual(self.worker_b.get('x'), 2)
+
+
+class FakeConnection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(SimpleTestCase):
+    """Tests for the per-worker database connection pool."""
+
+    def test_released_connection_is_reused(self):
+        pool = ConnectionPool(size=2)
+        connects = connection_stats['connects']
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+        self.assertIs(pool.acquire(FakeConnection), first)
+        self.assertEqual(connection_stats['connects'], connects + 1)
+
+    def test_pool_keeps_at_most_size_idle_connections(self):
+        pool = ConnectionPool(size=1)
+        first, second = pool.acquire(FakeConnection), pool.acquire(FakeConnection)
+        pool.release(first)
+        pool.release(second)
+        self.assertTrue(second.closed)
+        self.assertFalse(first.closed)
+
+    def test_broken_connections_are_discarded(self):
+        def reset(connection):
+            raise ConnectionError
+
+        pool = ConnectionPool(size=1, reset=reset)
+        connection = pool.acquire(FakeConnection)
+        pool.release(connection)
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.acquire(FakeConnection), connection)
+
+    def test_stale_connections_are_pinged(self):
+        def ping(connection):
+            raise ConnectionError
+
+        pool = ConnectionPool(size=1, ping=ping, ping_after=0)
+        connection = pool.acquire(FakeConnection)
+        pool.release(connection)
+        self.assertIsNot(pool.acquire(FakeConnection), connection)
+        self.assertTrue(connection.closed)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class TestReplicaRouter(SimpleTestCase):
+    """Tests for read-replica routing and read-your-writes pinning."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.state = _RequestState(pinned=False)
+        self.token = _request_state.set(self.state)
+
+    def tearDown(self):
+        _request_state.reset(self.token)
+
+    def test_reads_use_primary_unless_view_allows_replica(self):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        self.state.use_replica = True
+        self.assertEqual(self.router.db_for_read(User), 'replica_0')
+
+    def test_write_pins_reads_to_primary(self):
+        self.state.use_replica = True
+        self.assertEqual(self.router.db_for_write(User), 'default')
+        self.assertTrue(self.state.wrote)
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_session_writes_do_not_pin(self):
+        from django.contrib.sessions.models import Session
+        self.router.db_for_write(Session)
+        self.assertFalse(self.state.wrote)
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica_0', 'listings'))
+        self.assertTrue(self.router.allow_migrate('default', 'listings'))
+
+
+class TestReplicaPinMiddleware(TestCase):
+    """Tests for the primary pin cookie set after writes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tutor', password='testpass123')
+
+    def test_write_sets_pin_cookie(self):
+        self.client.login(username='tutor', password='testpass123')
+        response = self.client.post(reverse('listing_create'), {
+            'title': 'Guitar', 'content': 'Chords', 'status': '0',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_read_does_not_set_pin_cookie(self):
+        response = self.client.get(reverse('home'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class TestImportTimeCommand(SimpleTestCase):
+    """Tests for the ``importtime`` management command."""
+
+    SAMPLE = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     crispy_forms.utils\n"
+        "import time:      2000 |       2120 |   crispy_forms.layout\n"
+        "import time:       500 |        500 | cloudinary\n"
+        "Traceback lines and other stderr noise\n"
+    )
+
+    def test_parse_importtime(self):
+        rows = parse_importtime(self.SAMPLE)
+        self.assertEqual(rows[1], ("crispy_forms.layout", 2000, 2120))
+        self.assertEqual(by_package(rows), {"crispy_forms": 2120, "cloudinary": 500})
+
+    def test_command_reports_packages(self):
+        out = StringIO()
+        call_command("importtime", "--import", "know_how.settings", "--limit", "3", stdout=out)
+        self.assertIn("Cold start importing know_how.settings", out.getvalue())
+        self.assertIn("django", out.getvalue())
+
+
+class TestServerTiming(TestCase):
+    """Tests for the Server-Timing middleware."""
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled_response_has_breakdown(self):
+        response = self.client.get(reverse("home"))
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('desc="1 templates"', timing)
+        self.assertRegex(timing, r"total;dur=[\d.]+$")
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_response_has_no_header(self):
+        response = self.client.get(reverse("home"))
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def test_cache_hits_and_misses(self):
+        cache = caches["default"]
+        cache.set("timing-test", 1)
+        timer = RequestTimer()
+        token = _current.set(timer)
+        try:
+            cache.get("timing-test")
+            cache.get_many(["timing-test", "timing-missing"])
+        finally:
+            _current.reset(token)
+        self.assertIn('cache;dur=', timer.header())
+        self.assertIn('desc="2 hit, 1 miss"', timer.header())
+
+
+@query_budget(3)
+def looping_view(request):
+    """Runs the classic N+1: one query per user."""
+    for user in User.objects.all():
+        User.objects.filter(pk=user.pk).exists()
+    return HttpResponse()
+
+
+class TestQueryInspector(TestCase):
+    """Tests for N+1 detection and query budgets."""
+
+    def setUp(self):
+        for index in range(5):
+            User.objects.create_user(username=f'user{index}')
+
+    def run_view(self):
+        middleware = QueryInspectorMiddleware(looping_view)
+        request = RequestFactory().get('/loop/')
+        request.resolver_match = ResolverMatch(looping_view, (), {})
+        return middleware(request)
+
+    def test_fingerprint_ignores_literals(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t1" WHERE id IN (%s, %s) AND name = \'x\' LIMIT 21'),
+            'SELECT * FROM "t1" WHERE id IN (...) AND name = ? LIMIT ?',
+        )
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    def test_logs_n_plus_one_and_budget(self):
+        with self.assertLogs('know_how.db.queries', 'WARNING') as logs:
+            self.run_view()
+        output = '\n'.join(logs.output)
+        self.assertIn('Possible N+1 on /loop/: 5 x', output)
+        self.assertIn('/loop/ ran 6 queries; its budget is 3', output)
+
+    def test_budget_raises_under_tests(self):
+        with self.assertRaises(QueryBudgetExceeded), self.assertLogs('know_how.db.queries'):
+            self.run_view()
+
+    @override_settings(SLOW_QUERY_MS=0, QUERY_BUDGET_RAISE=False)
+    def test_slow_queries_logged_with_plan(self):
+        with self.assertLogs('know_how.db.queries', 'WARNING') as logs:
+            self.run_view()
+        self.assertTrue(any('Slow query on /loop/' in line and 'SCAN' in line for line in logs.output))
+
+
+class TestMetricsEndpoint(TestCase):
+    """Tests for the Prometheus ``/metrics`` endpoint."""
+
+    def test_anonymous_is_forbidden(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+    @override_settings(METRICS_TOKEN="scrape-me")
+    def test_token_grants_access(self):
+        self.client.get(reverse("home"))
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-me"
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('http_request_duration_seconds_bucket{le="0.005",method="GET",status="200",view="home"}', body)
+        self.assertIn('http_request_db_queries_count{view="home"}', body)
+        self.assertIn("http_requests_in_flight", body)
+        self.assertIn('cache_requests_total{result="hits",tier="l1"}', body)
+
+    @override_settings(METRICS_TOKEN="scrape-me")
+    def test_wrong_token_is_forbidden(self):
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer nope")
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_can_read(self):
+        User.objects.create_user(username="ops", password="pw", is_staff=True)
+        self.client.login(username="ops", password="pw")
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+
+class TestAsyncMiddlewareChain(TestCase):
+    """Under ASGI the middleware chain must not put requests through threads."""
+
+    @override_settings(DEBUG=True)
+    def test_no_middleware_is_adapted(self):
+        # Django logs each adaptation under DEBUG
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    async def test_request_through_async_chain(self):
+        response = await self.async_client.get(reverse('home'), headers={'accept-encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('s-maxage', response['Cache-Control'])
+
+
+class TestProfilerMiddleware(TestCase):
+    """Tests for the staff-only request profiler."""
+
+    def setUp(self):
+        self.profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profile_dir.cleanup)
+        override = override_settings(PROFILER_DIR=self.profile_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        User.objects.create_user(username="staff", password="pw", is_staff=True)
+        User.objects.create_user(username="visitor", password="pw")
+
+    def test_staff_gets_collapsed_stacks(self):
+        self.client.login(username="staff", password="pw")
+        response = self.client.get(reverse("home"), {"_profile": "1"})
+        url = response["X-Profile-Url"]
+        self.assertIn(f'<{url}>; rel="profile"', response["Link"])
+        profile = self.client.get(url)
+        self.assertEqual(profile.status_code, 200)
+        self.assertEqual(profile["Content-Type"], "text/plain; charset=utf-8")
+
+    def test_sampler_collapses_stacks(self):
+        def busy():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+
+        with StackSampler(threading.get_ident(), 0.001) as sampler:
+            busy()
+        stack, samples = sampler.stacks.most_common(1)[0]
+        self.assertTrue(stack.endswith(
+            ";know_how.tests.TestProfilerMiddleware.test_sampler_collapses_stacks.<locals>.busy"
+        ))
+        self.assertGreater(samples, 5)
+
+    def test_overlapping_samplers_restore_switch_interval(self):
+        original = sys.getswitchinterval()
+        first = StackSampler(threading.get_ident(), 0.001)
+        second = StackSampler(threading.get_ident(), 0.002)
+        first.__enter__()
+        second.__enter__()
+        first.__exit__(None, None, None)
+        # Not restored while another sampler is running
+        self.assertEqual(sys.getswitchinterval(), 0.001)
+        second.__exit__(None, None, None)
+        self.assertEqual(sys.getswitchinterval(), original)
+
+    async def test_staff_profiled_under_asgi(self):
+        staff = await User.objects.aget(username="staff")
+        await sync_to_async(self.async_client.force_login)(staff)
+        for mode in ("1", "cprofile"):
+            response = await self.async_client.get(reverse("home"), {"_profile": mode})
+            self.assertIn(response["X-Profile-Url"].rsplit(".", 1)[1], ("collapsed", "prof"))
+
+    def test_cprofile_mode_by_header(self):
+        self.client.login(username="staff", password="pw")
+        response = self.client.get(reverse("home"), HTTP_X_PROFILE="cprofile")
+        self.assertTrue(response["X-Profile-Url"].endswith(".prof"))
+        self.assertEqual(self.client.get(response["X-Profile-Url"]).status_code, 200)
+
+    def test_only_known_modes_profile(self):
+        self.client.login(username="staff", password="pw")
+        for value in ("0", "false", "no"):
+            response = self.client.get(reverse("home"), {"_profile": value})
+            self.assertFalse(response.has_header("X-Profile-Url"))
+        response = self.client.get(reverse("home"), {"_profile": "sample"})
+        self.assertTrue(response["X-Profile-Url"].endswith(".collapsed"))
+
+    @override_settings(PROFILER_KEEP=2)
+    def test_keeps_newest_profiles(self):
+        self.client.login(username="staff", password="pw")
+        for stem in ("20200101-000000-a", "20200102-000000-b"):
+            open(os.path.join(self.profile_dir.name, f"{stem}.prof"), "w").close()
+        response = self.client.get(reverse("home"), {"_profile": "1"})
+        newest = response["X-Profile-Url"].rsplit("/", 1)[1]
+        self.assertEqual(sorted(os.listdir(self.profile_dir.name)),
+                         ["20200102-000000-b.prof", newest])
+
+    def test_non_staff_is_not_profiled(self):
+        self.client.login(username="visitor", password="pw")
+        response = self.client.get(reverse("home"), {"_profile": "1"})
+        self.assertFalse(response.has_header("X-Profile-Url"))
+        self.assertEqual(os.listdir(self.profile_dir.name), [])
+        self.assertEqual(
+            self.client.get(reverse("profile_result", args=["x.prof"])).status_code, 404
+        )
+
+
+class TestMemoryDiagnostics(TestCase):
+    """Tests for the worker memory report."""
+
+    def setUp(self):
+        User.objects.create_user(username="staff", password="pw", is_staff=True)
+        self.client.login(username="staff", password="pw")
+        self.addCleanup(lambda: tracemalloc.is_tracing() and stop_tracing())
+
+    def test_report_without_tracing(self):
+        report = self.client.get(reverse("memory")).json()
+        self.assertGreater(report["rss_kib"], 0)
+        self.assertEqual(len(report["gc"]["generations"]), 3)
+        self.assertIn("django", report["cached_templates"])
+        self.assertIsNone(report["tracemalloc"])
+
+    def test_tracing_diffs_snapshots(self):
+        first = self.client.get(reverse("memory"), {"trace": "start", "frames": 2}).json()
+        self.assertIn("size_kib", first["tracemalloc"]["top"][0])
+        second = self.client.get(reverse("memory")).json()
+        self.assertIn("size_diff_kib", second["tracemalloc"]["top"][0])
+        self.assertEqual(len(second["tracemalloc"]["top"][0]["site"]), 2)
+        stopped = self.client.get(reverse("memory"), {"trace": "stop"}).json()
+        self.assertIsNone(stopped["tracemalloc"])
+
+    def test_bad_frames_rejected(self):
+        for frames in ("x", "0", "-1", "²", "70000"):
+            response = self.client.get(reverse("memory"), {"trace": "start", "frames": frames})
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_non_staff_gets_404(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("memory")).status_code, 404)
+
+    def test_signal_handler_logs_report(self):
+        with self.assertLogs("know_how.memory", "WARNING") as logs:
+            log_memory_report().join(5)
+        self.assertIn('"rss_kib"', logs.output[0])
+
+
+class TestSeedData(TestCase):
+    """Tests for the ``seed_data`` management command."""
+
+    def seed(self, **options):
+        defaults = dict(users=40, listings=120, reviews=300, pages=6, nav_lists=2,
+                        batch_size=50, seed=7, stdout=StringIO())
+        defaults.update(options)
+        call_command("seed_data", **defaults)
+
+    def test_seeds_every_model_without_signals(self):
+        from listings.models import Listing, TimeSlot
+        from profiles.models import UserProfile
+        from reviews.models import Review
+        from site_content.models import NavigationList
+
+        self.seed()
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(UserProfile.objects.count(), 40)
+        self.assertEqual(Listing.objects.count(), 120)
+        self.assertTrue(TimeSlot.objects.exists())
+        self.assertEqual(NavigationList.objects.count(), 2)
+        reviews = Review.objects.all()
+        self.assertGreater(reviews.count(), 250)
+        self.assertFalse(reviews.filter(author=models.F("target_user")).exists())
+        self.assertGreater(
+            Review.objects.dates("created_on", "month").count(), 1,
+            "created_on should be spread out rather than all 'now'",
+        )
+
+    def test_popularity_is_long_tailed(self):
+        from listings.models import Listing
+
+        self.seed()
+        per_tutor = list(
+            Listing.objects.values("tutor").annotate(n=models.Count("id"))
+            .order_by("-n").values_list("n", flat=True)
+        )
+        self.assertGreater(per_tutor[0], 5 * per_tutor[-1])
+
+    def test_reruns_append_and_ids_keep_working(self):
+        self.seed(users=5, listings=5, reviews=5, pages=1)
+        self.seed(users=5, listings=5, reviews=5, pages=1)
+        self.assertEqual(User.objects.count(), 10)
+        user = User.objects.create_user("after_seed")
+        self.assertEqual(user.pk, 11)
+        self.assertTrue(hasattr(user, "profile"))
+
+
+class TestSessions(TestCase):
+    """Tests for the cached session engine and batched expiry cleanup."""
+
+    def test_authenticated_request_reads_session_from_cache(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        user = User.objects.create_user(username='learner', password='testpass123')
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('profiles:profile', args=['learner']))
+        self.assertFalse(any('django_session' in query['sql'] for query in queries))
+
+    def test_clear_expired_sessions_deletes_in_batches(self):
+        from datetime import timedelta
+
+        from django.contrib.sessions.models import Session
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import timezone
+
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'old{index:029d}', session_data='', expire_date=now - timedelta(days=1))
+             for index in range(25)]
+            + [Session(session_key=f'new{index:029d}', session_data='', expire_date=now + timedelta(days=1))
+               for index in range(5)]
+        )
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('clear_expired_sessions', batch_size=10, pause=0, stdout=out)
+        self.assertIn('Deleted 25 expired sessions in 3 batches', out.getvalue())
+        self.assertEqual(Session.objects.count(), 5)
+        deletes = [query['sql'] for query in queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+
+
+class TestStaticAssets(TestCase):
+    """Tests for how base.html loads the critical static assets."""
+
+    def test_script_deferred_and_nothing_fetched_twice(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '<script src="/static/js/index.js" defer></script>')
+        # The stylesheets and script are all in <head>, so preloading them gains nothing
+        self.assertNotContains(response, 'rel="preload"')
+        self.assertContains(response, '/static/css/style.css', count=1)
+
+
+class TestCompressionMiddleware(SimpleTestCase):
+    """Tests for Brotli/gzip negotiation and streaming compression."""
+
+    PAGE = b'<html><body>' + b'<p>Guitar lessons in Leeds</p>' * 100 + b'</body></html>'
+
+    def respond(self, response, accept_encoding):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiate(self):
+        self.assertEqual(negotiate('gzip, deflate, br'), 'br')
+        self.assertEqual(negotiate('gzip, br;q=0.5'), 'gzip')
+        self.assertEqual(negotiate('br;q=0, *'), 'gzip')
+        self.assertIsNone(negotiate('identity'))
+        self.assertIsNone(negotiate(''))
+
+    def test_html_is_compressed_with_preferred_encoding(self):
+        import brotli
+        import gzip
+
+        response = self.respond(HttpResponse(self.PAGE, headers={'ETag': '"v1"'}), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.PAGE)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.respond(HttpResponse(self.PAGE), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.PAGE)
+
+    def test_small_and_binary_responses_are_left_alone(self):
+        response = self.respond(HttpResponse(b'<p>short</p>'), 'br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.respond(HttpResponse(self.PAGE, content_type='image/png'), 'br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_partial_responses_are_left_alone(self):
+        response = self.respond(HttpResponse(self.PAGE, status=206), 'br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = HttpResponse(self.PAGE, headers={'Content-Range': 'bytes 0-99/5000'})
+        self.assertFalse(self.respond(response, 'br').has_header('Content-Encoding'))
+
+    def test_pages_with_csrf_token_get_padded_gzip(self):
+        import gzip
+        from django.middleware.csrf import get_token
+
+        def view(request):
+            get_token(request)
+            return HttpResponse(self.PAGE)
+
+        lengths = set()
+        for _ in range(10):
+            request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br, gzip')
+            request.META['CSRF_COOKIE'] = 'x' * 32
+            response = CompressionMiddleware(view)(request)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(response.content), self.PAGE)
+            lengths.add(len(response.content))
+        self.assertGreater(len(lengths), 1)
+
+    def test_streamed_chunks_are_flushed_one_by_one(self):
+        import zlib
+        from django.http import StreamingHttpResponse
+
+        events = [f'data: {index}\n\n'.encode() for index in range(3)]
+        response = self.respond(
+            StreamingHttpResponse(iter(events), content_type='text/event-stream'), 'gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        received = [decoder.decompress(chunk) for chunk in response.streaming_content]
+        # Every event decodes as soon as its chunk arrives
+        self.assertEqual(received[:3], events)
+
+
+class TestJinja2Templates(TestCase):
+    """The Jinja2 copies of the hot pages must render like the Django templates."""
+
+    def setUp(self):
+        from listings.models import Listing
+        from reviews.models import Review
+        self.tutor = User.objects.create_user(
+            username='tutor', password='testpass123', first_name='Ada', last_name='Lovelace'
+        )
+        self.student = User.objects.create_user(username='student', password='testpass123')
+        self.viewer = User.objects.create_user(username='viewer', password='testpass123')
+        for index in range(3):
+            Listing.objects.create(
+                title=f'Guitar {index}', slug=f'guitar-{index}', tutor=self.tutor,
+                content='x', short_description='Learn chords & scales', status=1,
+            )
+        Review.objects.create(
+            target_user=self.tutor, author=self.student, rating=7,
+            title='Great <b>tutor</b>', body='Very clear',
+        )
+
+    def render_with(self, engine, path):
+        for cache in caches.all():
+            cache.clear()
+        with override_settings(HOT_TEMPLATE_ENGINE=engine):
+            response = self.client.get(path, HTTP_ACCEPT_ENCODING='identity')
+        self.assertEqual(response.status_code, 200)
+        html = re.sub(r'name="csrfmiddlewaretoken" value="[^"]*"', '', response.content.decode())
+        return re.sub(r'>\s+<', '><', ' '.join(html.split()))
+
+    def assertSameHTML(self, path):
+        self.assertEqual(self.render_with('django', path), self.render_with('jinja2', path))
+
+    def test_listing_grid_anonymous(self):
+        self.assertSameHTML(reverse('home'))
+
+    def test_listing_grid_signed_in(self):
+        self.client.login(username='viewer', password='testpass123')
+        self.assertSameHTML(reverse('home'))
+
+    def test_listing_cards_fragment(self):
+        self.assertSameHTML(reverse('home') + '?fragment=cards')
+
+    def test_listing_grid_pages(self):
+        from listings.models import Listing
+        from listings.views import ListingList
+        for index in range(3, ListingList.paginate_by + 5):
+            Listing.objects.create(
+                title=f'Guitar {index}', slug=f'guitar-{index}', tutor=self.tutor,
+                content='x', status=1,
+            )
+        for path in (reverse('home'), reverse('home') + '?page=2'):
+            with self.subTest(path=path):
+                self.assertSameHTML(path)
+                self.assertIn('?page=', self.render_with('jinja2', path))
+
+    def test_listing_grid_trending_second_page(self):
+        from listings.models import Listing
+        for index in range(3, 20):
+            Listing.objects.create(
+                title=f'Guitar {index}', slug=f'guitar-{index}', tutor=self.tutor,
+                content='x', status=1, trending_score=index,
+            )
+        self.assertSameHTML(reverse('home') + '?sort=trending&page=2')
+
+    def test_view_can_pin_engine(self):
+        from asgiref.sync import async_to_sync
+        from django.contrib.auth.models import AnonymousUser
+        from django.contrib.sessions.backends.db import SessionStore
+        from django.test.signals import template_rendered
+        from listings.views import ListingList, listing_list_async
+
+        def engine_used(view):
+            for cache in caches.all():
+                cache.clear()
+            request = RequestFactory().get(reverse('home'))
+            request.user = AnonymousUser()
+            request.session = SessionStore()
+            rendered = []
+            def record(sender, template, **kwargs):
+                rendered.append(template.name)
+            template_rendered.connect(record)
+            try:
+                response = view(request)
+                if hasattr(response, 'render'):
+                    response.render()
+            finally:
+                template_rendered.disconnect(record)
+            self.assertEqual(response.status_code, 200)
+            # Only Django templates send template_rendered
+            return 'django' if 'listings/index.html' in rendered else 'jinja2'
+
+        with override_settings(HOT_TEMPLATE_ENGINE='django'):
+            self.assertEqual(engine_used(ListingList.as_view()), 'django')
+            self.assertEqual(engine_used(ListingList.as_view(template_engine='jinja2')), 'jinja2')
+            self.assertEqual(engine_used(async_to_sync(listing_list_async)), 'django')
+            self.assertEqual(engine_used(
+                lambda request: async_to_sync(listing_list_async)(request, template_engine='jinja2')
+            ), 'jinja2')
+
+    def test_profile_with_review_form(self):
+        self.client.login(username='viewer', password='testpass123')
+        self.assertSameHTML(reverse('profiles:profile', args=['tutor']))
+
+    def test_profile_with_own_review(self):
+        self.client.login(username='student', password='testpass123')
+        self.assertSameHTML(reverse('profiles:profile', args=['tutor']))
+
+    def test_profile_owner(self):
+        self.client.login(username='tutor', password='testpass123')
+        self.assertSameHTML(reverse('profiles:profile', args=['tutor']))
+
+
+class TestCrispyLayoutCache(TestCase):
+    """Tests for class-level crispy layouts and the cached unbound rendering."""
+
+    def render(self, form):
+        from crispy_forms.utils import render_crispy_form
+        return render_crispy_form(form)
+
+    def test_helper_shared_per_class_and_variant(self):
+        from profiles.forms import ReviewForm
+        from reviews.models import Review
+        self.assertIs(ReviewForm().helper, ReviewForm().helper)
+        edit = ReviewForm(instance=Review(pk=1, rating=5, title='Old', body='Text'))
+        self.assertIsNot(edit.helper, ReviewForm().helper)
+        self.assertIn('Update Review', self.render(edit))
+        self.assertIn('Submit Review', self.render(ReviewForm()))
+
+    def test_form_without_layout_fails_when_defined(self):
+        from django import forms
+        from .forms import CrispyLayoutMixin
+        with self.assertRaisesMessage(TypeError, 'NoLayoutForm must define a build_layout'):
+            class NoLayoutForm(CrispyLayoutMixin, forms.Form):
+                name = forms.CharField()
+
+    def test_unbound_layout_rendered_once(self):
+        from profiles.forms import ReviewForm
+        form = ReviewForm()
+        form.helper._rendered.clear()
+        first = self.render(form)
+        self.assertEqual(self.render(ReviewForm()), first)
+        self.assertEqual(len(form.helper._rendered), 1)
+
+    def test_bound_form_renders_values_and_errors(self):
+        from profiles.forms import ReviewForm
+        self.render(ReviewForm())
+        form = ReviewForm({'rating': 4, 'title': 'Patient teacher'})
+        html = self.render(form)
+        self.assertIn('value="Patient teacher"', html)
+        self.assertIn('This field is required.', html)
+        self.assertFalse(form.is_pristine)
+        self.assertFalse(ReviewForm(initial={'title': 'Draft'}).is_pristine)
@@ -0,0 +1,169 @@
+"""
+Per-request performance breakdown, reported in a ``Server-Timing`` header.
+
+``ServerTimingMiddleware`` samples ``SERVER_TIMING_SAMPLE_RATE`` of
+requests. For a sampled request it records:
+
+- database time and query count, via ``execute_wrapper``
+- top-level template render time, via ``TimedDjangoTemplates``
+- ``TieredCache`` hits and misses
+- Cloudinary URL building
+
+Browser devtools show the result under the request's Timing tab.
+Unsampled requests only pay for one context variable lookup at each
+instrumented point.
+"""
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends import django as django_backend
+
+from .middleware import AsyncCapableMiddleware
+
+_current = ContextVar("server_timing", default=None)
+
+# (metric, description) in header order; the description may use counts
+METRICS = {
+    "db": "{db} queries",
+    "tpl": "{tpl} templates",
+    "cache": "{cache_hit} hit, {cache_miss} miss",
+    "cdn": "{cdn} Cloudinary URLs",
+}
+
+
+class RequestTimer:
+    """Durations (seconds) and counters collected for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = Counter()
+        self.counts = Counter()
+
+    def header(self):
+        entries = []
+        for name, description in METRICS.items():
+            if name not in self.durations and name not in self.counts:
+                continue
+            desc = description.format_map(self.counts)
+            entries.append(f'{name};dur={self.durations[name] * 1000:.1f};desc="{desc}"')
+        total = time.perf_counter() - self.started
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def record(name, seconds=0.0, n=1):
+    """Add ``seconds`` and ``n`` to metric ``name`` if this request is sampled."""
+    timer = _current.get()
+    if timer is not None:
+        timer.durations[name] += seconds
+        timer.counts[name] += n
+
+
+def count(name, n=1):
+    timer = _current.get()
+    if timer is not None:
+        timer.counts[name] += n
+
+
+@contextmanager
+def timed(name):
+    if _current.get() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def _time_query(execute, sql, params, many, context):
+    with timed("db"):
+        return execute(sql, params, many, context)
+
+
+class TimedDjangoTemplates(django_backend.DjangoTemplates):
+    """Django template backend that times each top-level render."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class TimedTemplate:
+    """Wraps a backend template so ``render`` counts towards ``tpl``."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with timed("tpl"):
+            return self.template.render(context, request)
+
+
+def instrument_cloudinary():
+    """Time ``CloudinaryResource.build_url`` (what ``image.url`` calls)."""
+    from cloudinary import CloudinaryResource
+
+    build_url = CloudinaryResource.build_url
+    if getattr(build_url, "server_timing", False):
+        return
+
+    @wraps(build_url)
+    def timed_build_url(self, **options):
+        with timed("cdn"):
+            return build_url(self, **options)
+
+    timed_build_url.server_timing = True
+    CloudinaryResource.build_url = timed_build_url
+
+
+class ServerTimingMiddleware(AsyncCapableMiddleware):
+    """Add a ``Server-Timing`` header to a sample of responses."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        instrument_cloudinary()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        with timing() as timer:
+            response = self.get_response(request)
+        response["Server-Timing"] = timer.header()
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return await self.get_response(request)
+        with timing() as timer:
+            response = await self.get_response(request)
+        response["Server-Timing"] = timer.header()
+        return response
+
+
+@contextmanager
+def timing():
+    """Collect a ``RequestTimer`` for everything run inside the block."""
+    timer = RequestTimer()
+    token = _current.set(timer)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_time_query))
+            yield timer
+    finally:
+        _current.reset(token)
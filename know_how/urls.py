@@ -18,6 +18,12 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from . import views
+from .memory import memory
+from .metrics import metrics
+from .profiling import profile_result
+
+admin.autodiscover()
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,6 +32,10 @@ urlpatterns = [
     path("profile/", include("profiles.urls")),
     path("reviews/", include("reviews.urls")),
     path('summernote/', include('django_summernote.urls')),
+    path("fragments/personal/", views.personal_fragments, name="personal_fragments"),
+    path("metrics", metrics, name="metrics"),
+    path("_profiles/<str:name>", profile_result, name="profile_result"),
+    path("_memory/", memory, name="memory"),
     path("", include("listings.urls"), name="listings-urls"),
 ]
 
@@ -0,0 +1,64 @@
+"""
+Async-capable subclasses of third-party middleware (see ``know_how.middleware``).
+
+Neither WhiteNoise 6.9 nor allauth 0.57 marks its middleware as
+``async_capable``, so each would put the ASGI chain through a thread.
+Settings name this module's ``WhiteNoiseMiddleware`` directly. allauth
+refuses to start unless its own dotted path is in ``MIDDLEWARE``, so
+``install()`` (run from ``KnowHowConfig.ready``) puts this module's
+``AccountMiddleware`` behind that path instead.
+"""
+import asyncio
+
+from allauth.account import middleware as allauth_middleware
+from allauth.account.middleware import AccountMiddleware as BaseAccountMiddleware
+from allauth.core.context import request_context
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from .middleware import match_handler_mode
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        match_handler_mode(self, get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # Either a static file, or what the async get_response returns
+        response = super().__call__(request)
+        return await response if asyncio.iscoroutine(response) else response
+
+
+class AccountMiddleware(BaseAccountMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        match_handler_mode(self, get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        with request_context(request):
+            response = await self.get_response(request)
+            # Reads the session, which may mean a query
+            await sync_to_async(self._remove_dangling_login)(request, response)
+            return response
+
+
+def install():
+    allauth_middleware.AccountMiddleware = AccountMiddleware
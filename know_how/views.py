@@ -0,0 +1,26 @@
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.views.decorators.cache import never_cache
+
+# Personalized fragments that shared-cached pages leave as placeholders
+FRAGMENT_TEMPLATES = {
+    "nav": "includes/nav.html",
+    "messages": "includes/messages.html",
+    "hero": "listings/includes/hero_actions.html",
+}
+
+
+@never_cache
+def personal_fragments(request):
+    """
+    Return the per-user HTML fragments requested via ``?slot=``.
+
+    Called by ``static/js/index.js`` on pages served from the shared cache.
+    """
+    slots = request.GET.getlist("slot") or list(FRAGMENT_TEMPLATES)
+    fragments = {
+        slot: render_to_string(FRAGMENT_TEMPLATES[slot], request=request)
+        for slot in slots
+        if slot in FRAGMENT_TEMPLATES
+    }
+    return JsonResponse({"fragments": fragments})
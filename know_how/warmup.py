@@ -0,0 +1,64 @@
+"""
+Pre-fork warm-up for gunicorn's ``preload_app``.
+
+Everything loaded here lives in the master process and is shared
+copy-on-write by every worker, instead of each worker importing and
+compiling it on its first requests.
+"""
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+# Templates behind the busiest pages, including their includes, which
+# Django only compiles when they are first rendered
+HOT_TEMPLATES = [
+    "base.html",
+    "includes/nav.html",
+    "includes/messages.html",
+    "listings/index.html",
+    "listings/includes/hero_actions.html",
+    "listings/includes/listing_cards.html",
+    "listings/listing_detail.html",
+    "listings/create_listing.html",
+    "profile.html",
+    "page_default.html",
+    "account/login.html",
+    "account/signup.html",
+]
+
+# Their Jinja2 copies, compiled when HOT_TEMPLATE_ENGINE selects them
+HOT_JINJA2_TEMPLATES = [
+    "base.html",
+    "includes/nav.html",
+    "includes/messages.html",
+    "listings/index.html",
+    "listings/includes/hero_actions.html",
+    "listings/includes/listing_cards.html",
+    "profile.html",
+]
+
+
+def warm_up():
+    # Build the URL resolver's reverse lookup tables
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.namespace_dict
+    resolver.app_dict
+
+    # Compile into the cached template loader
+    for name in HOT_TEMPLATES:
+        get_template(name)
+    if settings.HOT_TEMPLATE_ENGINE == "jinja2":
+        for name in HOT_JINJA2_TEMPLATES:
+            get_template(name, using="jinja2")
+
+    # Crispy's per-field templates are only loaded by rendering a form
+    from crispy_forms.utils import render_crispy_form
+    from listings.forms import ListingForm
+    from profiles.forms import ReviewForm
+    for form_class in (ListingForm, ReviewForm):
+        render_crispy_form(form_class())
+
+    # Never hand a connection opened by the master to the workers
+    connections.close_all()
@@ -6,7 +6,7 @@ from django_summernote.admin import SummernoteModelAdmin
 
 @admin.register(Listing)
 class ListingAdmin(SummernoteModelAdmin):
-    list_display = ('title', 'location', 'session_time', 'slug', 'status', 'created_on', 'updated_on')
+    list_display = ('title', 'location', 'session_time', 'slug', 'status', 'trending_score', 'created_on', 'updated_on')
     search_fields = ['title']
     list_filter = ('status','created_on')
     prepopulated_fields = {'slug': ('title',)}
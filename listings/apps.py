@@ -1,6 +1,19 @@
+import atexit
+
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_finished
 
 
 class ListingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'listings'
+
+    def ready(self):
+        import listings.signals  # Purges the edge cache on listing changes
+        from listings import popularity
+
+        request_finished.connect(popularity.flush_if_due, dispatch_uid="flush_listing_views")
+        if settings.VIEW_COUNT_FLUSH_INTERVAL is not None:
+            # Don't lose a worker's last few seconds of views on restart
+            atexit.register(popularity.flush_views)
@@ -0,0 +1,128 @@
+"""
+Per-worker fan-out of seat availability for the listing SSE streams.
+
+One ``SeatBroadcaster`` lives in each ASGI worker. While anyone is
+subscribed it polls seat counts for the watched listings with a single
+query (so changes made by any worker show up), and time slot saves in
+this worker trigger an immediate refresh. Each subscriber gets a small
+bounded queue; when a slow client falls behind, the oldest update is
+dropped, since only the latest seat count matters.
+
+A failed refresh is logged and the poller carries on, so the streams
+pick up again at the next poll once the database is back.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from .models import TimeSlot
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 2.0
+QUEUE_SIZE = 4
+
+
+async def seat_counts(listing_ids):
+    """Map each listing id to ``{slot id: seats left}`` in one query."""
+    seats = {listing_id: {} for listing_id in listing_ids}
+    rows = TimeSlot.objects.filter(
+        listing_id__in=listing_ids, status=1
+    ).values_list("listing_id", "id", "event_spaces_available", "is_available")
+    async for listing_id, slot_id, available, is_available in rows:
+        seats[listing_id][slot_id] = available if is_available else 0
+    return seats
+
+
+class SeatBroadcaster:
+    """Seat-count fan-out for one worker process."""
+
+    def __init__(self, poll_interval=POLL_INTERVAL, queue_size=QUEUE_SIZE):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._loop = None
+        self._reset()
+
+    def _reset(self):
+        self._subscribers = defaultdict(set)
+        self._snapshots = {}
+        self._poller = None
+        # The loop keeps only weak references to tasks
+        self._refreshes = set()
+
+    async def subscribe(self, listing_id):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A fresh event loop (new worker or test); old queues are dead
+            self._loop = loop
+            self._reset()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[listing_id].add(queue)
+        if listing_id in self._snapshots:
+            queue.put_nowait(self._snapshots[listing_id])
+        else:
+            await self.refresh([listing_id])
+        if self._poller is None:
+            self._poller = loop.create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, listing_id, queue):
+        subscribers = self._subscribers.get(listing_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[listing_id]
+            self._snapshots.pop(listing_id, None)
+
+    def publish(self, listing_id, seats, force=False):
+        """Send ``seats`` to every subscriber of the listing if it changed."""
+        if not force and self._snapshots.get(listing_id) == seats:
+            return
+        self._snapshots[listing_id] = seats
+        for queue in self._subscribers.get(listing_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(seats)
+
+    def notify(self, listing_id):
+        """Thread-safe hook for sync code: refresh a listing right away."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or listing_id not in self._subscribers:
+            return
+        loop.call_soon_threadsafe(self._start_refresh, listing_id)
+
+    def _start_refresh(self, listing_id):
+        task = self._loop.create_task(self.refresh([listing_id]))
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    async def refresh(self, listing_ids):
+        # The poller outlives any request, so nothing else recycles its
+        # connection: drop it if it has failed or reached CONN_MAX_AGE
+        await sync_to_async(close_old_connections)()
+        try:
+            seats = await seat_counts(listing_ids)
+        except Exception:
+            logger.exception("Could not refresh seat counts of listings %s", listing_ids)
+            return
+        finally:
+            await sync_to_async(close_old_connections)()
+        for listing_id, slot_seats in seats.items():
+            if listing_id in self._subscribers:
+                self.publish(listing_id, slot_seats)
+
+    async def _poll(self):
+        try:
+            while self._subscribers:
+                await asyncio.sleep(self.poll_interval)
+                if self._subscribers:
+                    await self.refresh(list(self._subscribers))
+        finally:
+            self._poller = None
+
+
+seat_broadcaster = SeatBroadcaster()
@@ -0,0 +1,76 @@
+"""
+Keyset cursors for the listings feed's infinite scroll.
+
+The feed is ordered newest first by ``(created_on, id)``. A cursor names the
+last card a page showed, as ``<microseconds since the epoch>-<id>``; the
+next page is the rows strictly after it in that order. Unlike ``?page=N``
+this needs no ``COUNT(*)``, costs the same however deep the reader
+scrolls, and does not skip or repeat cards when listings are published
+meanwhile.
+
+The "trending" sort works the same way on ``(trending_score, id)``, with
+the score in place of the timestamp. Scores move when ``update_trending``
+runs, so a reader scrolling across a run may see a card twice or miss one.
+"""
+import math
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+from django.http import Http404
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# Header carrying the cursor of the following page on fragment responses;
+# empty on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# The feed's orders, by ``?sort=``; each has a matching index on Listing
+SORTS = {
+    "newest": ("-created_on", "-id"),
+    "trending": ("-trending_score", "-id"),
+}
+
+
+def feed_sort(request):
+    sort = request.GET.get("sort")
+    return sort if sort in SORTS else "newest"
+
+
+def encode_cursor(listing, sort="newest"):
+    if sort == "trending":
+        return f"{listing.trending_score!r}-{listing.pk}"
+    return f"{(listing.created_on - EPOCH) // MICROSECOND}-{listing.pk}"
+
+
+def decode_cursor(cursor, sort="newest"):
+    try:
+        # rsplit, as a score can look like 1e-05
+        value, pk = cursor.rsplit("-", 1)
+        if sort == "trending":
+            score = float(value)
+            if not math.isfinite(score):
+                raise ValueError(value)
+            return score, int(pk)
+        return EPOCH + int(value) * MICROSECOND, int(pk)
+    except (ValueError, OverflowError):
+        raise Http404("Invalid cursor")
+
+
+def after_cursor(queryset, cursor, sort="newest"):
+    """The part of ``queryset`` (in ``sort`` order) after ``cursor``; all of it if empty."""
+    if not cursor:
+        return queryset
+    value, pk = decode_cursor(cursor, sort)
+    field = SORTS[sort][0].lstrip("-")
+    return queryset.filter(Q(**{f"{field}__lt": value}) | Q(**{field: value, "pk__lt": pk}))
+
+
+def split_page(rows, per_page, sort="newest"):
+    """
+    Split ``per_page + 1`` fetched rows into the page and the next cursor.
+
+    The extra row only tells whether another page exists.
+    """
+    page = rows[:per_page]
+    return page, encode_cursor(page[-1], sort) if len(rows) > per_page else ""
@@ -1,13 +1,12 @@
 from django import forms
 from django.utils.text import slugify
-from crispy_forms.helper import FormHelper
-from crispy_forms.layout import Layout, Field, Submit, Div, HTML
-from crispy_forms.bootstrap import FormActions
+
+from know_how.forms import CrispyLayoutMixin
 
 from .models import Listing, TimeSlot
 
 
-class ListingForm(forms.ModelForm):
+class ListingForm(CrispyLayoutMixin, forms.ModelForm):
     """Form for creating and editing listings."""
     
     class Meta:
@@ -23,12 +22,15 @@ class ListingForm(forms.ModelForm):
         
         # Make image field optional (remove required asterisk)
         self.fields['image'].required = False
-        
-        submit_text = 'Update Listing' if getattr(self.instance, 'pk', None) else 'Create Listing'
 
-        # Crispy forms helper
-        self.helper = FormHelper()
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls, variant):
+        from crispy_forms.bootstrap import FormActions
+        from crispy_forms.layout import HTML, Div, Field, Layout, Submit
+
+        submit_text = 'Update Listing' if variant == 'edit' else 'Create Listing'
+
+        return Layout(
             Div(
                 HTML('<h3 class="">Course Information</h3>'),
                 Field('title', css_class='input input-bordered w-full mb-4'),
@@ -71,7 +73,7 @@ class ListingForm(forms.ModelForm):
         return listing
 
 
-class TimeSlotForm(forms.ModelForm):
+class TimeSlotForm(CrispyLayoutMixin, forms.ModelForm):
     """Form for creating time slots for listings."""
     
     class Meta:
@@ -82,11 +84,12 @@ class TimeSlotForm(forms.ModelForm):
             'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
         }
     
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        
-        self.helper = FormHelper()
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls, variant):
+        from crispy_forms.bootstrap import FormActions
+        from crispy_forms.layout import HTML, Div, Field, Layout, Submit
+
+        return Layout(
             Div(
                 HTML('<h3 class="mb-4 text-lg font-semibold">Schedule Information</h3>'),
                 Div(
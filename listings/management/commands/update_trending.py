@@ -0,0 +1,20 @@
+"""
+Recompute the listings' trending scores.
+
+    python manage.py update_trending
+
+Folds the hourly view counts flushed by the web workers into
+``Listing.trending_score`` (see ``listings/popularity.py``) and deletes
+counts too old to matter. Run it from the scheduler, every ten minutes or
+so; the "Trending" sort is only as fresh as the last run.
+"""
+from django.core.management.base import BaseCommand
+
+from listings.popularity import update_trending
+
+
+class Command(BaseCommand):
+    help = "Recompute trending scores from recent listing views."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Updated trending scores of {update_trending()} listings.")
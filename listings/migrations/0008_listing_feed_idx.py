@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-19 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0007_alter_listing_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['status', '-created_on', '-id'], name='listing_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.23 on 2026-10-19 02:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_listing_feed_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['status', '-trending_score', '-id'], name='listing_trending_idx'),
+        ),
+        migrations.AddField(
+            model_name='listingviews',
+            name='listing',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='listings.listing'),
+        ),
+        migrations.AddConstraint(
+            model_name='listingviews',
+            constraint=models.UniqueConstraint(fields=('listing', 'hour'), name='listing_views_hour_uniq'),
+        ),
+    ]
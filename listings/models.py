@@ -25,11 +25,37 @@ class Listing(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
     status = models.IntegerField(choices=STATUS, default=0)
+    # Recent views, decayed over time; kept by listings/popularity.py
+    trending_score = models.FloatField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # The home feed: published listings, newest first, paged by cursor
+            models.Index(fields=["status", "-created_on", "-id"], name="listing_feed_idx"),
+            # The same, most viewed lately first
+            models.Index(fields=["status", "-trending_score", "-id"], name="listing_trending_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} --- by {self.tutor}"
 
 
+class ListingViews(models.Model):
+    """Detail page views of a listing within one hour."""
+    objects: Manager = models.Manager()
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="+")
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # The conflict target of the view counter's upsert
+            models.UniqueConstraint(fields=["listing", "hour"], name="listing_views_hour_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.listing_id} @ {self.hour}: {self.views}"
+
 
 class TimeSlot(models.Model):
     objects: Manager = models.Manager()
@@ -0,0 +1,132 @@
+"""
+View counts and the trending score behind the feed's "Trending" sort.
+
+Counting a view is an in-memory increment: each worker buffers the views
+of its listing pages and writes them out together at most every
+``VIEW_COUNT_FLUSH_INTERVAL`` seconds, from ``request_finished`` (so after
+the response has gone) and once more when the worker exits. A flush is a
+single ``INSERT ... ON CONFLICT DO UPDATE`` adding the buffered counts to
+each listing's row for the current hour, however many views it carries.
+Views buffered by a worker that is killed outright are lost; the counts
+are for ranking, not billing.
+
+``update_trending`` (``manage.py update_trending``, from the scheduler)
+folds the hourly rows of the last ``TRENDING_WINDOW`` hours into
+``Listing.trending_score``, each view counting half as much for every
+``TRENDING_HALF_LIFE`` hours of age, and drops older rows. It is one
+``UPDATE`` with the weighted sums in a subquery, writing only the scores
+that changed. The feed then
+reads the ``listing_trending_idx`` index, never the view rows.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, router
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Listing, ListingViews
+
+logger = logging.getLogger(__name__)
+
+# Views not yet written, by listing id; shared by the worker's threads
+_pending = Counter()
+_lock = threading.Lock()
+_next_flush = 0.0
+
+
+def record_view(listing_id):
+    with _lock:
+        _pending[listing_id] += 1
+
+
+def flush_views():
+    """Add this worker's buffered views to the database; return how many."""
+    with _lock:
+        counts = dict(_pending)
+        _pending.clear()
+    if not counts:
+        return 0
+    alias = router.db_for_write(ListingViews)
+    hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    try:
+        # Listings deleted since they were viewed would break the foreign key
+        live = Listing.objects.using(alias).filter(pk__in=counts).values_list("pk", flat=True)
+        rows = [(pk, hour, counts[pk]) for pk in live]
+        if rows:
+            upsert_views(connections[alias], rows)
+    except DatabaseError:
+        logger.exception("Could not flush %s listing views", sum(counts.values()))
+        with _lock:
+            _pending.update(counts)
+        return 0
+    return sum(views for _, _, views in rows)
+
+
+def upsert_views(connection, rows):
+    """Add ``(listing_id, hour, views)`` rows to the hourly counts in one statement."""
+    quote = connection.ops.quote_name
+    table = quote(ListingViews._meta.db_table)
+    listing, hour, views = (quote(ListingViews._meta.get_field(name).column)
+                            for name in ("listing", "hour", "views"))
+    values = ", ".join(["(%s, %s, %s)"] * len(rows))
+    params = [
+        value
+        for pk, bucket, count in rows
+        for value in (pk, connection.ops.adapt_datetimefield_value(bucket), count)
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({listing}, {hour}, {views}) VALUES {values} "
+            f"ON CONFLICT ({listing}, {hour}) DO UPDATE SET {views} = {table}.{views} + EXCLUDED.{views}",
+            params,
+        )
+
+
+def flush_if_due(**kwargs):
+    """``request_finished`` receiver: flush once every ``VIEW_COUNT_FLUSH_INTERVAL``."""
+    global _next_flush
+    interval = settings.VIEW_COUNT_FLUSH_INTERVAL
+    if interval is None:
+        return
+    now = time.monotonic()
+    with _lock:
+        if now < _next_flush:
+            return
+        _next_flush = now + interval
+    flush_views()
+    # Django closed connections for this request before this receiver ran
+    close_old_connections()
+
+
+def update_trending(now=None):
+    """Recompute the listings' trending scores; return how many changed."""
+    now = now or timezone.now()
+    ListingViews.objects.filter(hour__lt=now - timedelta(hours=settings.TRENDING_WINDOW)).delete()
+    # Views are counted by the hour, so there are only TRENDING_WINDOW ages
+    # to weigh: the database sums the weighted views, not Python
+    weight = Case(
+        *[
+            When(hour=hour, then=Value(0.5 ** ((now - hour) / timedelta(hours=1) / settings.TRENDING_HALF_LIFE)))
+            for hour in ListingViews.objects.values_list("hour", flat=True).distinct()
+        ],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    score = Subquery(
+        ListingViews.objects.filter(listing=OuterRef("pk"))
+        .values("listing")
+        .annotate(score=Sum(F("views") * weight, output_field=FloatField()))
+        .values("score")
+    )
+    return (
+        Listing.objects.filter(Q(trending_score__gt=0) | Q(pk__in=ListingViews.objects.values("listing")))
+        .annotate(new_score=Coalesce(score, 0.0, output_field=FloatField()))
+        .exclude(trending_score=F("new_score"))
+        .update(trending_score=F("new_score"))
+    )
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from know_how.edge_cache import purge_later
+from .broadcast import seat_broadcaster
+from .models import Listing, TimeSlot
+
+
+@receiver([post_save, post_delete], sender=Listing)
+def purge_listing_pages(sender, instance, **kwargs):
+    # No edge cache to purge; don't queue a job that would do nothing
+    if settings.EDGE_CACHE_PURGE_URL:
+        purge_later.enqueue("listings")
+
+
+@receiver([post_save, post_delete], sender=TimeSlot)
+def push_seat_availability(sender, instance, **kwargs):
+    listing_id = instance.listing_id
+    transaction.on_commit(lambda: seat_broadcaster.notify(listing_id))
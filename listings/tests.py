@@ -1,3 +1,359 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, AsyncRequestFactory, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User, AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import Http404
+from django.utils import timezone
+from .broadcast import SeatBroadcaster, seat_counts
+from .models import Listing, ListingViews, TimeSlot
+from . import popularity, views
 
-# Create your tests here.
+
+class TestListingListView(TestCase):
+    """Tests for the home page listing feed."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='tutor',
+            email='tutor@example.com',
+            password='testpass123'
+        )
+        Listing.objects.create(
+            title='Guitar Basics',
+            slug='guitar-basics',
+            tutor=self.user,
+            content='Chords and strumming',
+            status=1,
+        )
+
+    def test_home_is_shared_cacheable(self):
+        """Home page is public, tagged and does not vary on the session cookie."""
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage', response['Cache-Control'])
+        self.assertEqual(response['Surrogate-Key'], 'listings')
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+
+    def test_home_renders_anonymous_placeholders_for_logged_in_user(self):
+        """Per-user markup is left to the fragments endpoint."""
+        self.client.login(username='tutor', password='testpass123')
+        response = self.client.get(reverse('home'))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertContains(response, 'data-fragment="nav"')
+        self.assertContains(response, 'data-fragment="hero"')
+        self.assertNotContains(response, 'My Profile')
+
+
+class TestListingFeedFragments(TestCase):
+    """Tests for the card-grid fragments behind the feed's infinite scroll."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tutor', password='testpass123')
+        for index in range(20):
+            Listing.objects.create(
+                title=f'Lesson {index:02}', slug=f'lesson-{index}', tutor=self.user,
+                content='x', status=1,
+            )
+        # Same timestamp for half of them, so the id has to break ties
+        Listing.objects.filter(slug__in=[f'lesson-{index}' for index in range(5, 15)]).update(
+            created_on=timezone.now()
+        )
+        self.feed = list(views.ListingList.queryset.values_list('title', flat=True))
+
+    def titles(self, response):
+        return [title for title in self.feed if title in response.content.decode()]
+
+    def test_cursor_pages_cover_feed_once(self):
+        seen = []
+        cursor = ''
+        for _ in range(3):
+            response = self.client.get(reverse('home'), {'fragment': 'cards', 'cursor': cursor})
+            self.assertNotContains(response, '<html')
+            seen += self.titles(response)
+            cursor = response['X-Next-Cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, self.feed)
+        self.assertEqual(cursor, '')
+
+    def test_full_page_continues_with_cursor(self):
+        page = self.client.get(reverse('home'))
+        self.assertContains(page, 'data-pagination')
+        cursor = page.context['next_cursor']
+        self.assertContains(page, f'data-next-cursor="{cursor}"')
+        response = self.client.get(reverse('home'), {'fragment': 'cards', 'cursor': cursor})
+        self.assertEqual(self.titles(response), self.feed[9:18])
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('home'), {'fragment': 'cards', 'cursor': 'nope'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_fragment_skips_count_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('home'), {'fragment': 'cards'})
+
+    async def test_async_fragment(self):
+        request = AsyncRequestFactory().get('/', {'fragment': 'cards'})
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        response = await views.listing_list_async(request)
+        self.assertEqual(self.titles(response), self.feed[:9])
+        self.assertEqual(response['X-Next-Cursor'], views.encode_cursor(
+            await views.ListingList.queryset.filter(title=self.feed[8]).aget()
+        ))
+
+
+class TestListingAsyncViews(TestCase):
+    """Tests for the async listing views used under ASGI."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tutor', password='testpass123')
+        Listing.objects.create(
+            title='Guitar Basics', slug='guitar-basics', tutor=self.user,
+            content='Chords', status=1,
+        )
+        Listing.objects.create(
+            title='Secret Draft', slug='secret-draft', tutor=self.user,
+            content='Hidden', status=0,
+        )
+
+    def get_request(self, path, **params):
+        request = AsyncRequestFactory().get(path, params)
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        return request
+
+    async def test_listing_list_async(self):
+        response = await views.listing_list_async(self.get_request('/'))
+        self.assertContains(response, 'Guitar Basics')
+        self.assertNotContains(response, 'Secret Draft')
+        self.assertEqual(response['Surrogate-Key'], 'listings')
+
+    async def test_listing_list_async_invalid_page(self):
+        with self.assertRaises(Http404):
+            await views.listing_list_async(self.get_request('/', page='9'))
+
+    async def test_listing_detail_async_hides_drafts(self):
+        response = await views.listing_detail_async(
+            self.get_request('/guitar-basics/'), slug='guitar-basics'
+        )
+        self.assertContains(response, 'Guitar Basics')
+        with self.assertRaises(Http404):
+            await views.listing_detail_async(
+                self.get_request('/secret-draft/'), slug='secret-draft'
+            )
+
+
+class TestSeatAvailabilityStream(TestCase):
+    """Tests for the Server-Sent Events seat availability stream."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tutor', password='testpass123')
+        self.listing = Listing.objects.create(
+            title='Guitar Basics', slug='guitar-basics', tutor=self.user,
+            content='Chords', status=1,
+        )
+        start = timezone.now() + timezone.timedelta(days=1)
+        self.slot = TimeSlot.objects.create(
+            listing=self.listing, start_time=start,
+            end_time=start + timezone.timedelta(hours=1),
+            event_spaces=10, event_spaces_available=4, status=1,
+        )
+
+    def test_detail_lists_upcoming_slots(self):
+        response = self.client.get(reverse('listing_detail', args=['guitar-basics']))
+        self.assertContains(response, f'data-seat-slot="{self.slot.id}">4<')
+        self.assertContains(response, 'data-seats-stream=')
+
+    def test_wsgi_returns_snapshot_with_retry(self):
+        response = self.client.get(reverse('listing_seats_stream', args=['guitar-basics']))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('retry: '))
+        self.assertIn(f'data: {{"{self.slot.id}": 4}}', body)
+
+    async def test_asgi_streams_changes(self):
+        request = AsyncRequestFactory().get('/guitar-basics/seats/stream/')
+        response = await views.listing_seats_stream(request, slug='guitar-basics')
+        self.assertTrue(response.streaming)
+        events = views.stream_seats(self.listing.id)
+        try:
+            self.assertTrue((await anext(events)).startswith('retry: '))
+            self.assertIn(f'{{"{self.slot.id}": 4}}', await anext(events))
+            views.seat_broadcaster.publish(self.listing.id, {self.slot.id: 3})
+            self.assertIn(f'{{"{self.slot.id}": 3}}', await anext(events))
+        finally:
+            await events.aclose()
+        self.assertNotIn(self.listing.id, views.seat_broadcaster._subscribers)
+
+    async def test_slow_subscriber_keeps_latest(self):
+        broadcaster = SeatBroadcaster(poll_interval=60, queue_size=2)
+        queue = await broadcaster.subscribe(self.listing.id)
+        for seats in range(3, 0, -1):
+            broadcaster.publish(self.listing.id, {self.slot.id: seats})
+        self.assertEqual(queue.qsize(), 2)
+        self.assertEqual(queue.get_nowait(), {self.slot.id: 2})
+        self.assertEqual(queue.get_nowait(), {self.slot.id: 1})
+        broadcaster.unsubscribe(self.listing.id, queue)
+
+
+    async def test_failed_poll_keeps_streaming(self):
+        broadcaster = SeatBroadcaster(poll_interval=0.01)
+        queue = await broadcaster.subscribe(self.listing.id)
+        self.assertEqual(queue.get_nowait(), {self.slot.id: 4})
+        failures = iter([RuntimeError('database gone')])
+
+        async def flaky_seat_counts(listing_ids):
+            for error in failures:
+                raise error
+            return await seat_counts(listing_ids)
+
+        with self.assertLogs('listings.broadcast', 'ERROR'), \
+                mock.patch('listings.broadcast.seat_counts', flaky_seat_counts):
+            await TimeSlot.objects.filter(pk=self.slot.pk).aupdate(event_spaces_available=2)
+            self.assertEqual(await asyncio.wait_for(queue.get(), 5), {self.slot.id: 2})
+        broadcaster.unsubscribe(self.listing.id, queue)
+
+class TestListingQueryBudgets(TestCase):
+    """Listing pages must stay within their query budgets as data grows."""
+
+    def setUp(self):
+        for index in range(12):
+            tutor = User.objects.create_user(
+                username=f'tutor{index}', password='testpass123', first_name=f'Tutor{index}',
+            )
+            Listing.objects.create(
+                title=f'Listing {index}', slug=f'listing-{index}', tutor=tutor,
+                content='Content', status=1,
+            )
+
+    def test_listing_list_joins_tutors(self):
+        self.client.login(username='tutor0', password='testpass123')
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Tutor11')
+
+    def test_listing_detail_within_budget(self):
+        self.client.login(username='tutor0', password='testpass123')
+        response = self.client.get(reverse('listing_detail', args=['listing-0']))
+        self.assertContains(response, 'Listing 0')
+
+
+class TestListingPopularity(TestCase):
+    """Tests for buffered view counts and the trending sort."""
+
+    def setUp(self):
+        popularity._pending.clear()
+        self.user = User.objects.create_user(username='tutor', password='testpass123')
+        self.listings = [
+            Listing.objects.create(
+                title=f'Lesson {index:02}', slug=f'lesson-{index}', tutor=self.user,
+                content='x', status=1,
+            )
+            for index in range(12)
+        ]
+
+    def view(self, listing, times=1):
+        for _ in range(times):
+            self.client.get(reverse('listing_detail', args=[listing.slug]))
+
+    def test_views_are_buffered_then_added_up(self):
+        self.view(self.listings[0], 2)
+        self.view(self.listings[1])
+        self.assertFalse(ListingViews.objects.exists())
+        with self.assertNumQueries(2):
+            self.assertEqual(popularity.flush_views(), 3)
+        self.view(self.listings[0])
+        self.assertEqual(popularity.flush_views(), 1)
+        self.assertEqual(
+            dict(ListingViews.objects.values_list('listing__slug', 'views')),
+            {'lesson-0': 3, 'lesson-1': 1},
+        )
+        self.assertEqual(popularity.flush_views(), 0)
+
+    def test_drafts_are_not_counted(self):
+        Listing.objects.filter(pk=self.listings[0].pk).update(status=0)
+        self.client.login(username='tutor', password='testpass123')
+        self.view(self.listings[0])
+        self.assertEqual(popularity.flush_views(), 0)
+
+    def test_deleted_listing_is_skipped(self):
+        self.view(self.listings[0])
+        self.listings[0].delete()
+        self.assertEqual(popularity.flush_views(), 0)
+
+    def test_update_trending_decays_and_prunes(self):
+        now = timezone.now()
+        hot, cooling, stale, idle = self.listings[:4]
+        Listing.objects.filter(pk=idle.pk).update(trending_score=5)
+        ListingViews.objects.create(listing=hot, hour=now, views=10)
+        ListingViews.objects.create(listing=cooling, hour=now - timedelta(hours=24), views=10)
+        ListingViews.objects.create(listing=cooling, hour=now, views=1)
+        ListingViews.objects.create(listing=stale, hour=now - timedelta(days=8), views=100)
+
+        self.assertEqual(popularity.update_trending(now), 3)
+        scores = dict(Listing.objects.values_list('slug', 'trending_score'))
+        self.assertAlmostEqual(scores['lesson-0'], 10)
+        self.assertAlmostEqual(scores['lesson-1'], 6)
+        self.assertEqual((scores['lesson-2'], scores['lesson-3']), (0, 0))
+        self.assertFalse(ListingViews.objects.filter(listing=stale).exists())
+        # Nothing changed since, so nothing is written
+        self.assertEqual(popularity.update_trending(now), 0)
+
+    def test_trending_sort(self):
+        for index, listing in enumerate(self.listings):
+            # Ties on the score fall back to the newest
+            Listing.objects.filter(pk=listing.pk).update(trending_score=[0.5, 1e-05, 3][index % 3])
+        expected = list(Listing.objects.filter(status=1).order_by('-trending_score', '-id')
+                        .values_list('title', flat=True))
+        page = self.client.get(reverse('home'), {'sort': 'trending'})
+        self.assertEqual([listing.title for listing in page.context['listing_list']], expected[:9])
+        self.assertContains(page, 'sort=trending&amp;page=2')
+
+        response = self.client.get(reverse('home'), {
+            'sort': 'trending', 'fragment': 'cards', 'cursor': page.context['next_cursor'],
+        })
+        seen = [title for title in expected if title in response.content.decode()]
+        self.assertEqual(seen, expected[9:])
+        self.assertEqual(response['X-Next-Cursor'], '')
+
+    def test_update_trending_command(self):
+        self.view(self.listings[0])
+        popularity.flush_views()
+        out = StringIO()
+        call_command('update_trending', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Updated trending scores of 1 listings.')
+        self.listings[0].refresh_from_db()
+        self.assertGreater(self.listings[0].trending_score, 0.9)
+
+    def test_unknown_sort_is_newest(self):
+        page = self.client.get(reverse('home'), {'sort': 'nope'})
+        self.assertEqual(page.context['sort'], 'newest')
+        self.assertEqual(page.context['listing_list'][0], self.listings[-1])
+
+
+class TestViewCountFlush(TransactionTestCase):
+    """Workers flush their buffered views when a request finishes, once per interval."""
+
+    def setUp(self):
+        popularity._pending.clear()
+        popularity._next_flush = 0
+        user = User.objects.create_user(username='tutor', password='testpass123')
+        self.listing = Listing.objects.create(
+            title='Guitar Basics', slug='guitar-basics', tutor=user, content='x', status=1,
+        )
+
+    @override_settings(VIEW_COUNT_FLUSH_INTERVAL=60)
+    def test_flushes_after_request_once_per_interval(self):
+        url = reverse('listing_detail', args=[self.listing.slug])
+        self.client.get(url)
+        self.assertEqual(ListingViews.objects.get().views, 1)
+        self.client.get(url)
+        self.assertEqual(ListingViews.objects.get().views, 1)
+        self.assertEqual(popularity.flush_views(), 1)
@@ -1,13 +1,22 @@
 """URL patterns for the listings app."""
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_VIEWS:
+    listing_list = views.listing_list_async
+    listing_detail = views.listing_detail_async
+else:
+    listing_list = views.ListingList.as_view()
+    listing_detail = views.listing_detail
+
 urlpatterns = [
-    path("", views.ListingList.as_view(), name="home"),
+    path("", listing_list, name="home"),
     path("create/", views.ListingCreateView.as_view(), name="listing_create"),
     path("<slug:slug>/edit/", views.ListingUpdateView.as_view(), name="listing_edit"),
     path("<slug:slug>/delete/", views.ListingDeleteView.as_view(), name="listing_delete"),
     path("<slug:slug>/publish/", views.publish_listing, name="listing_publish"),
-    path('<slug:slug>/', views.listing_detail, name='listing_detail'),
+    path("<slug:slug>/seats/stream/", views.listing_seats_stream, name="listing_seats_stream"),
+    path('<slug:slug>/', listing_detail, name='listing_detail'),
 ]
 
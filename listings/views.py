@@ -1,22 +1,82 @@
+import asyncio
+import json
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views import generic
+from django.utils import timezone
 from .models import Listing
+from .broadcast import seat_broadcaster, seat_counts
+from .feed import NEXT_CURSOR_HEADER, SORTS, after_cursor, encode_cursor, feed_sort, split_page
+from .popularity import record_view
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse, reverse_lazy
 from .forms import ListingForm
-from django.http import Http404  # added
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse  # added
+from django.core.paginator import InvalidPage, Paginator
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.utils.decorators import method_decorator
+from know_how.async_utils import aget_object_or_404, aget_user, arender
+from know_how.db.queries import query_budget
+from know_how.db.routers import read_from_replica
+from know_how.edge_cache import shared_cache
+from know_how.hot_templates import HotTemplateMixin, hot_engine
 
 # Create your views here.
-class ListingList(generic.ListView):
-    """Displays a list of published listings."""
-    queryset = Listing.objects.filter(status=1).order_by("-created_on")
+@query_budget(4)
+@method_decorator(shared_cache("listings"), name="dispatch")
+@method_decorator(read_from_replica, name="dispatch")
+class ListingList(HotTemplateMixin, generic.ListView):
+    """
+    Displays a list of published listings.
+
+    With ``?fragment=cards`` it returns only the cards after ``?cursor=``
+    and the next cursor in a header, which ``static/js/index.js`` appends
+    for infinite scroll. A query parameter rather than a request header
+    keeps fragments and full pages apart in the shared cache.
+    ``?sort=trending`` orders either by recent views instead.
+    """
+    queryset = Listing.objects.filter(status=1).select_related("tutor").order_by("-created_on", "-id")
     template_name = "listings/index.html"
+    cards_template_name = "listings/includes/listing_cards.html"
     paginate_by = 9
     # context_object_name = "object_list"
 
+    def get_queryset(self):
+        return super().get_queryset().order_by(*SORTS[feed_sort(self.request)])
+
+    def get(self, request, *args, **kwargs):
+        if wants_cards(request):
+            sort = feed_sort(request)
+            queryset = after_cursor(self.get_queryset(), request.GET.get("cursor"), sort)
+            cards, next_cursor = split_page(list(queryset[:self.paginate_by + 1]), self.paginate_by, sort)
+            return cards_response(
+                render(request, self.cards_template_name, {"listing_list": cards}, using=self.template_engine),
+                next_cursor,
+            )
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page_obj = context["page_obj"]
+        # Evaluates the page's queryset, which the template then reuses
+        cards = list(page_obj.object_list)
+        context["sort"] = sort = feed_sort(self.request)
+        context["next_cursor"] = encode_cursor(cards[-1], sort) if page_obj.has_next() else ""
+        return context
+
+
+def wants_cards(request):
+    return request.GET.get("fragment") == "cards"
+
 
+def cards_response(response, next_cursor):
+    response[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+@query_budget(6)
+@read_from_replica
 def listing_detail(request, slug):
     """
     Displays a single listing.
@@ -27,8 +87,129 @@ def listing_detail(request, slug):
     if listing.status != 1:
         if not (request.user.is_authenticated and (request.user == listing.tutor or request.user.is_staff or request.user.is_superuser)):
             raise Http404("Listing not found")
+    else:
+        record_view(listing.pk)
+
+    return render(request, "listings/listing_detail.html", {
+        "listing": listing,
+        "time_slots": upcoming_time_slots(listing),
+    })
+
+
+def upcoming_time_slots(listing):
+    """Published, bookable time slots of a listing that have not started."""
+    return listing.time_slots.filter(
+        status=1, is_available=True, start_time__gte=timezone.now()
+    ).order_by("start_time")
+
+
+@query_budget(4)
+@shared_cache("listings")
+@read_from_replica
+async def listing_list_async(request, template_engine=None):
+    """Async counterpart of ``ListingList`` for the ASGI deployment."""
+    sort = feed_sort(request)
+    queryset = ListingList.queryset.order_by(*SORTS[sort])
+    if wants_cards(request):
+        per_page = ListingList.paginate_by
+        rows = after_cursor(queryset, request.GET.get("cursor"), sort)[:per_page + 1]
+        cards, next_cursor = split_page([listing async for listing in rows], per_page, sort)
+        return cards_response(
+            await arender(request, ListingList.cards_template_name, {
+                "listing_list": cards,
+            }, using=hot_engine(template_engine)),
+            next_cursor,
+        )
+    paginator = Paginator(queryset, ListingList.paginate_by)
+    paginator.count = await queryset.acount()
+    try:
+        page_obj = paginator.page(request.GET.get("page") or 1)
+    except InvalidPage:
+        raise Http404("Invalid page")
+    page_obj.object_list = [listing async for listing in page_obj.object_list]
+    return await arender(request, ListingList.template_name, {
+        "listing_list": page_obj.object_list,
+        "object_list": page_obj.object_list,
+        "page_obj": page_obj,
+        "paginator": paginator,
+        "is_paginated": page_obj.has_other_pages(),
+        "sort": sort,
+        "next_cursor": encode_cursor(page_obj.object_list[-1], sort) if page_obj.has_next() else "",
+    }, using=hot_engine(template_engine))
+
+
+@query_budget(6)
+@read_from_replica
+async def listing_detail_async(request, slug):
+    """Async counterpart of ``listing_detail`` for the ASGI deployment."""
+    listing = await aget_object_or_404(Listing.objects.select_related("tutor"), slug=slug)
+
+    if listing.status != 1:
+        user = await aget_user(request)
+        if not (user.is_authenticated and (user == listing.tutor or user.is_staff or user.is_superuser)):
+            raise Http404("Listing not found")
+    else:
+        record_view(listing.pk)
+
+    return await arender(request, "listings/listing_detail.html", {
+        "listing": listing,
+        "time_slots": [slot async for slot in upcoming_time_slots(listing)],
+    })
+
+
+# Server-Sent Events settings for the seat availability stream
+SEAT_STREAM_RETRY_MS = 5000
+SEAT_STREAM_HEARTBEAT = 15
+# Django 4.2 does not cancel a streaming response when the client goes
+# away, so each stream ends after this long and EventSource reconnects.
+SEAT_STREAM_MAX_SECONDS = 300
+
+
+def seat_event(seats):
+    return f"event: seats\ndata: {json.dumps(seats)}\n\n"
+
+
+async def listing_seats_stream(request, slug):
+    """
+    Stream seat availability for a listing's time slots as Server-Sent Events.
+
+    Under ASGI the connection stays open and receives an event whenever
+    the counts change. Under WSGI a held-open stream would tie up a worker,
+    so a single snapshot is returned and the browser polls at the
+    ``retry`` interval instead.
+    """
+    listing = await aget_object_or_404(Listing.objects.all(), slug=slug, status=1)
+
+    if not isinstance(request, ASGIRequest):
+        seats = (await seat_counts([listing.id]))[listing.id]
+        response = HttpResponse(
+            f"retry: {SEAT_STREAM_RETRY_MS}\n\n" + seat_event(seats),
+            content_type="text/event-stream",
+        )
+    else:
+        response = StreamingHttpResponse(
+            stream_seats(listing.id), content_type="text/event-stream"
+        )
+        response["X-Accel-Buffering"] = "no"
+    response["Cache-Control"] = "no-cache"
+    return response
+
 
-    return render(request, "listings/listing_detail.html", {"listing": listing})
+async def stream_seats(listing_id):
+    queue = await seat_broadcaster.subscribe(listing_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SEAT_STREAM_MAX_SECONDS
+    try:
+        yield f"retry: {SEAT_STREAM_RETRY_MS}\n\n"
+        while loop.time() < deadline:
+            try:
+                seats = await asyncio.wait_for(queue.get(), SEAT_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield seat_event(seats)
+    finally:
+        seat_broadcaster.unsubscribe(listing_id, queue)
 
 
 class ListingCreateView(LoginRequiredMixin, generic.CreateView):
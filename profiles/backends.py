@@ -0,0 +1,43 @@
+"""
+Authentication backend that loads ``request.user`` together with its profile.
+
+Templates read ``user.profile`` on most pages, which would otherwise cost a
+second query after the lazy user lookup. ``get_user`` joins the profile in
+and keeps the result in the shared cache for ``AUTH_USER_CACHE_TIMEOUT``
+seconds, so consecutive requests from the same user skip the query
+altogether. ``profiles.signals`` forgets the cached copy whenever the user
+or the profile is saved or deleted; updates that bypass signals (queryset
+``update()``) show up once the timeout passes.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+CACHE_KEY = "auth-user:{}"
+
+
+def user_cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def forget_cached_user(user_id):
+    user_cache().delete(CACHE_KEY.format(user_id))
+
+
+class ProfileModelBackend(ModelBackend):
+    """``ModelBackend`` whose ``get_user`` joins the profile and caches the user."""
+
+    def get_user(self, user_id):
+        timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        key = CACHE_KEY.format(user_id)
+        user = user_cache().get(key) if timeout else None
+        if user is None:
+            UserModel = get_user_model()
+            try:
+                user = UserModel._default_manager.select_related("profile").get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            if timeout:
+                user_cache().set(key, user, timeout)
+        return user if self.user_can_authenticate(user) else None
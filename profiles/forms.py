@@ -1,12 +1,11 @@
 from django import forms
-from crispy_forms.helper import FormHelper
-from crispy_forms.layout import Layout, Field, Submit, Div, HTML
-from crispy_forms.bootstrap import FormActions
+
+from know_how.forms import CrispyLayoutMixin
 
 from .models import UserProfile
 from reviews.models import Review
 
-class UserProfileForm(forms.ModelForm):
+class UserProfileForm(CrispyLayoutMixin, forms.ModelForm):
     """Form for editing user profile."""
     
     # Add user fields that we want to edit
@@ -34,10 +33,13 @@ class UserProfileForm(forms.ModelForm):
             self.fields['first_name'].initial = self.instance.user.first_name
             self.fields['last_name'].initial = self.instance.user.last_name
             self.fields['email'].initial = self.instance.user.email
-        
-        # Crispy forms helper
-        self.helper = FormHelper()
-        self.helper.layout = Layout(
+
+    @classmethod
+    def build_layout(cls, variant):
+        from crispy_forms.bootstrap import FormActions
+        from crispy_forms.layout import HTML, Div, Field, Layout, Submit
+
+        return Layout(
             Div(
                 HTML('<h3 class="">Personal Information</h3>'),
                 Div(
@@ -83,7 +85,7 @@ class UserProfileForm(forms.ModelForm):
         
         return profile
 
-class ReviewForm(forms.ModelForm):
+class ReviewForm(CrispyLayoutMixin, forms.ModelForm):
     """Form for creating reviews."""
     
     class Meta:
@@ -94,19 +96,18 @@ class ReviewForm(forms.ModelForm):
             'rating': forms.Select(choices=[(i, f'{i}/10') for i in range(1, 11)])
         }
     
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        
-        # Determine if this is an edit or create form
-        is_edit = self.instance and self.instance.pk
-        button_text = 'Update Review' if is_edit else 'Submit Review'
-        
-        self.helper = FormHelper()
-        self.helper.layout = Layout(
+    @classmethod
+    def build_layout(cls, variant):
+        from crispy_forms.bootstrap import FormActions
+        from crispy_forms.layout import Field, Layout, Submit
+
+        button_text = 'Update Review' if variant == 'edit' else 'Submit Review'
+
+        return Layout(
             Field('rating', css_class='select'),
             Field('title', css_class='input'),
             Field('body', css_class='textarea'),
             FormActions(
                 Submit('submit', button_text, css_class='btn btn-primary')
             )
-        )
\ No newline at end of file
+        )
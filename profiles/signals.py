@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from .backends import forget_cached_user
 from .models import UserProfile
 
 @receiver(post_save, sender=User)
@@ -11,3 +12,10 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         # Only save if profile exists to avoid errors
         if hasattr(instance, 'profile'):
             instance.profile.save()
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+def forget_cached_request_user(sender, instance, **kwargs):
+    """Drop the copy of the user ``ProfileModelBackend`` keeps in the cache."""
+    forget_cached_user(instance.pk if sender is User else instance.user_id)
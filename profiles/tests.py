@@ -1,3 +1,89 @@
-from django.test import TestCase
+from django.test import TestCase, AsyncRequestFactory
+from django.urls import reverse
+from django.contrib.auth.models import User, AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from reviews.models import Review
+from . import views
+from .backends import ProfileModelBackend
 
-# Create your tests here.
+
+class TestProfileAsyncView(TestCase):
+    """Tests for the async profile page used under ASGI."""
+
+    def setUp(self):
+        self.tutor = User.objects.create_user(username='tutor', password='testpass123')
+        self.student = User.objects.create_user(username='student', password='testpass123')
+        Review.objects.create(
+            target_user=self.tutor, author=self.student, rating=8,
+            title='Great tutor', body='Very clear',
+        )
+
+    async def test_profile_detail_async(self):
+        request = AsyncRequestFactory().get('/profile/tutor/')
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        response = await views.profile_detail_async(request, username='tutor')
+        self.assertContains(response, 'Great tutor')
+        self.assertContains(response, 'student')
+        self.assertContains(response, '8.0 / 10')
+
+
+class TestProfileDetailQueries(TestCase):
+    """The profile page must stay within its query budget however many reviews it shows."""
+
+    def setUp(self):
+        self.tutor = User.objects.create_user(username='tutor', password='testpass123')
+        for index in range(12):
+            author = User.objects.create_user(username=f'student{index}', password='testpass123')
+            Review.objects.create(
+                target_user=self.tutor, author=author, rating=index % 10 + 1,
+                title=f'Review {index}', body='Helpful',
+            )
+
+    def test_reviews_with_authors_within_budget(self):
+        self.client.login(username='student0', password='testpass123')
+        response = self.client.get(reverse('profiles:profile', args=['tutor']))
+        self.assertContains(response, 'student11')
+        self.assertContains(response, '(12 reviews)')
+        self.assertContains(response, '4.8 / 10')
+
+
+class TestProfileModelBackend(TestCase):
+    """Tests for loading and caching request.user with its profile."""
+
+    def setUp(self):
+        from django.core.cache import caches
+        caches['shared'].clear()
+        self.user = User.objects.create_user(username='learner', password='testpass123')
+        self.backend = ProfileModelBackend()
+
+    def test_user_and_profile_load_in_one_query_then_from_cache(self):
+        with self.assertNumQueries(1):
+            user = self.backend.get_user(self.user.pk)
+            self.assertEqual(user.profile.user_id, self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk).profile.user_id, self.user.pk)
+
+    def test_saving_profile_or_user_forgets_cached_copy(self):
+        self.backend.get_user(self.user.pk)
+        self.user.profile.bio = 'Updated'
+        self.user.profile.save()
+        self.assertEqual(self.backend.get_user(self.user.pk).profile.bio, 'Updated')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_logged_in_requests_skip_user_query(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.force_login(self.user)
+        url = reverse('profiles:profile', args=['learner'])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.wsgi_request.user.pk, self.user.pk)
+        self.assertFalse(
+            [query for query in queries if 'WHERE "auth_user"."id" =' in query['sql']]
+        )
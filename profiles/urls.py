@@ -1,10 +1,16 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'profiles'
 
+if settings.ASYNC_VIEWS:
+    profile_detail = views.profile_detail_async
+else:
+    profile_detail = views.ProfileDetailView.as_view()
+
 urlpatterns = [
     # Profile views
-    path('<str:username>/', views.ProfileDetailView.as_view(), name='profile'),
+    path('<str:username>/', profile_detail, name='profile'),
     path('<str:username>/edit/', views.ProfileUpdateView.as_view(), name='profile_edit'),
 ]
\ No newline at end of file
@@ -1,29 +1,39 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Avg, Count, Prefetch
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.views.generic import DetailView, UpdateView
 from django.urls import reverse
+from django.utils.decorators import method_decorator
+from know_how.async_utils import aget_object_or_404, aget_user, arender
+from know_how.db.queries import query_budget
+from know_how.db.routers import read_from_replica
+from know_how.hot_templates import HotTemplateMixin, hot_engine
 
 from .models import UserProfile
 from reviews.models import Review
 from .forms import UserProfileForm, ReviewForm
 
-class ProfileDetailView(DetailView):
+@query_budget(8)
+@method_decorator(read_from_replica, name="dispatch")
+class ProfileDetailView(HotTemplateMixin, DetailView):
     """Display a user's profile page with their reviews and review form."""
     model = User
     template_name = 'profile.html'
     context_object_name = 'profile_user'
     slug_field = 'username'
     slug_url_kwarg = 'username'
-    
+    queryset = User.objects.select_related('profile')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.object
         
-        # Get user's reviews received
-        context['reviews'] = user.reviews_received.all()
-        context['total_reviews'] = user.reviews_received.count()
+        # Get user's reviews received, with their authors and summary in two queries
+        context['reviews'] = user.reviews_received.select_related('author')
+        context.update(review_summary(user))
         
         # Published listings
         context['listings'] = user.listings.filter(status=1)[:5]  # Latest 5 published listings
@@ -84,6 +94,62 @@ class ProfileDetailView(DetailView):
             messages.error(request, "There was an error with your review. Please check the form.")
             return self.get(request, *args, **kwargs)
 
+def review_summary(user):
+    """Review count and average rating for ``user`` in a single query."""
+    return user.reviews_received.aggregate(
+        total_reviews=Count('id'), average_rating=Avg('rating')
+    )
+
+
+@query_budget(8)
+@read_from_replica
+async def profile_detail_async(request, username, template_engine=None):
+    """Async counterpart of ``ProfileDetailView`` for the ASGI deployment."""
+    if request.method != "GET":
+        # Review submissions keep using the sync view
+        view = ProfileDetailView.as_view(template_engine=template_engine)
+        return await sync_to_async(view)(request, username=username)
+
+    # Profile and reviews (with authors) up front, so rendering runs no queries
+    user = await aget_object_or_404(
+        User.objects.select_related("profile").prefetch_related(
+            Prefetch("reviews_received", queryset=Review.objects.select_related("author"))
+        ),
+        username=username,
+    )
+    viewer = await aget_user(request)
+    reviews = list(user.reviews_received.all())
+    context = {
+        "object": user,
+        "profile_user": user,
+        "reviews": reviews,
+        "total_reviews": len(reviews),
+        "average_rating": (
+            sum(review.rating for review in reviews) / len(reviews) if reviews else None
+        ),
+        "listings": [listing async for listing in user.listings.filter(status=1)[:5]],
+        "draft_listings": [],
+        "can_review": False,
+    }
+
+    if viewer.is_authenticated and viewer == user:
+        context["draft_listings"] = [
+            listing async for listing in user.listings.filter(status=0).order_by("-updated_on")
+        ]
+
+    if viewer.is_authenticated and viewer != user:
+        existing_review = await Review.objects.filter(author=viewer, target_user=user).afirst()
+        if existing_review:
+            context["user_review"] = existing_review
+        else:
+            context["can_review"] = True
+            context["review_form"] = ReviewForm()
+
+    return await arender(
+        request, ProfileDetailView.template_name, context, using=hot_engine(template_engine)
+    )
+
+
 class ProfileUpdateView(LoginRequiredMixin, UpdateView):
     """Allow users to edit their own profile."""
     model = UserProfile
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SiteContentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'site_content'
+
+    def ready(self):
+        import site_content.signals  # Purges the edge cache on page changes
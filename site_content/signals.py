@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from know_how.edge_cache import purge_later
+from .models import Page
+
+
+@receiver([post_save, post_delete], sender=Page)
+def purge_page(sender, instance, **kwargs):
+    if settings.EDGE_CACHE_PURGE_URL:
+        purge_later.enqueue("pages", f"page-{instance.slug}")
@@ -1,3 +1,29 @@
-from django.test import TestCase
+from django.test import TestCase, AsyncRequestFactory
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import Http404
+from .models import Page
+from . import views
 
-# Create your tests here.
+
+class TestPageContentAsyncView(TestCase):
+    """Tests for the async static page view used under ASGI."""
+
+    def setUp(self):
+        Page.objects.create(title='About', slug='about', content='About us', status=1)
+        Page.objects.create(title='Draft', slug='draft', content='Soon', status=0)
+
+    def get_request(self, path):
+        request = AsyncRequestFactory().get(path)
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        return request
+
+    async def test_page_content_async(self):
+        response = await views.page_content_async(self.get_request('/pages/about/'), slug='about')
+        self.assertContains(response, 'About us')
+        self.assertEqual(response['Surrogate-Key'], 'pages page-about')
+
+    async def test_draft_page_is_not_found(self):
+        with self.assertRaises(Http404):
+            await views.page_content_async(self.get_request('/pages/draft/'), slug='draft')
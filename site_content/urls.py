@@ -1,7 +1,13 @@
 """URL patterns for the site_content app."""
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_VIEWS:
+    page_content = views.page_content_async
+else:
+    page_content = views.page_content
+
 urlpatterns = [
-    path('<slug:slug>/', views.page_content, name='page_content'),
+    path('<slug:slug>/', page_content, name='page_content'),
 ]
\ No newline at end of file
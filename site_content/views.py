@@ -1,7 +1,14 @@
 from django.shortcuts import render, get_object_or_404
+from know_how.async_utils import aget_object_or_404, arender
+from know_how.db.queries import query_budget
+from know_how.db.routers import read_from_replica
+from know_how.edge_cache import shared_cache
 from .models import Page
 
 # Create your views here.
+@query_budget(4)
+@shared_cache("pages", "page-{slug}")
+@read_from_replica
 def page_content(request, slug):
     """
     Displays a static page.
@@ -10,4 +17,13 @@ def page_content(request, slug):
     page = get_object_or_404(queryset, slug=slug)
 
 
-    return render(request, "page_default.html", {"page": page})
\ No newline at end of file
+    return render(request, "page_default.html", {"page": page})
+
+
+@query_budget(4)
+@shared_cache("pages", "page-{slug}")
+@read_from_replica
+async def page_content_async(request, slug):
+    """Async counterpart of ``page_content`` for the ASGI deployment."""
+    page = await aget_object_or_404(Page.objects.filter(status=1), slug=slug)
+    return await arender(request, "page_default.html", {"page": page})
@@ -1,3 +1,131 @@
 document.addEventListener("DOMContentLoaded", function () {
-  console.log("DOMContentLoaded");
+  loadPersonalFragments();
+  subscribeSeatCounts();
+  infiniteScroll();
 });
+
+/**
+ * Pages served from the shared cache render the anonymous navbar and hero
+ * buttons; swap in the per-user versions from the fragments endpoint.
+ */
+function loadPersonalFragments() {
+  const slots = document.querySelectorAll("[data-fragment]");
+  const endpoint = document.body.dataset.fragmentsUrl;
+  if (!slots.length || !endpoint) {
+    return;
+  }
+  const url = new URL(endpoint, window.location.origin);
+  slots.forEach(function (el) {
+    url.searchParams.append("slot", el.dataset.fragment);
+  });
+  fetch(url, {
+    credentials: "same-origin",
+    headers: { Accept: "application/json" },
+  })
+    .then(function (response) {
+      return response.ok ? response.json() : null;
+    })
+    .then(function (data) {
+      if (!data) {
+        return;
+      }
+      slots.forEach(function (el) {
+        const html = data.fragments[el.dataset.fragment];
+        if (html !== undefined) {
+          el.innerHTML = html;
+        }
+      });
+    })
+    .catch(function () {
+      // Keep the anonymous markup if the request fails
+    });
+}
+
+/**
+ * Keep the "seats left" badges on a listing page current. The server
+ * pushes a {slotId: seats} map whenever availability changes; under WSGI
+ * it sends one snapshot and EventSource re-polls at the retry interval.
+ */
+function subscribeSeatCounts() {
+  const list = document.querySelector("[data-seats-stream]");
+  if (!list || !window.EventSource) {
+    return;
+  }
+  const source = new EventSource(list.dataset.seatsStream);
+  source.addEventListener("seats", function (event) {
+    const seats = JSON.parse(event.data);
+    list.querySelectorAll("[data-seat-slot]").forEach(function (el) {
+      const available = seats[el.dataset.seatSlot];
+      if (available !== undefined) {
+        el.textContent = available;
+      }
+    });
+  });
+  window.addEventListener("pagehide", function () {
+    source.close();
+  });
+}
+
+/**
+ * Append the next page of listing cards as the reader nears the end of the
+ * feed. The server sends just the cards (?fragment=cards) and the cursor of
+ * the page after them in X-Next-Cursor, empty on the last page. The page
+ * links stay in place for browsers without IntersectionObserver and come
+ * back if a request fails.
+ */
+function infiniteScroll() {
+  const grid = document.querySelector("[data-next-cursor]");
+  if (!grid || !window.IntersectionObserver) {
+    return;
+  }
+  const pagination = document.querySelector("[data-pagination]");
+  const sentinel = document.createElement("div");
+  grid.after(sentinel);
+  if (pagination) {
+    pagination.style.display = "none";
+  }
+  let loading = false;
+  const observer = new IntersectionObserver(
+    function (entries) {
+      const cursor = grid.dataset.nextCursor;
+      if (!entries[0].isIntersecting || loading || !cursor) {
+        return;
+      }
+      loading = true;
+      const url = new URL(window.location.pathname, window.location.origin);
+      const sort = new URLSearchParams(window.location.search).get("sort");
+      if (sort) {
+        url.searchParams.set("sort", sort);
+      }
+      url.searchParams.set("fragment", "cards");
+      url.searchParams.set("cursor", cursor);
+      fetch(url, { credentials: "same-origin" })
+        .then(function (response) {
+          if (!response.ok) {
+            throw new Error(response.statusText);
+          }
+          grid.dataset.nextCursor = response.headers.get("X-Next-Cursor") || "";
+          return response.text();
+        })
+        .then(function (html) {
+          grid.insertAdjacentHTML("beforeend", html);
+          loading = false;
+          if (grid.dataset.nextCursor) {
+            // Re-check: the sentinel may still be on screen
+            observer.unobserve(sentinel);
+            observer.observe(sentinel);
+          } else {
+            observer.disconnect();
+          }
+        })
+        .catch(function () {
+          observer.disconnect();
+          if (pagination) {
+            pagination.style.display = "";
+          }
+        });
+    },
+    { rootMargin: "600px 0px" }
+  );
+  observer.observe(sentinel);
+}